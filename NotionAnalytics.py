@@ -1,42 +1,61 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import random
-import base64
-import re
+import datetime
+import os
+
+from assets import avatar_css, tag_person_icons
+from aggregates import AGGREGATES
+from blocks import (
+    CROSS_PRODUCT_MIX_COLORS,
+    CROSS_TEAM_MIX_COLORS,
+    DASHBOARD_CSS,
+    TEAM_MIX_COLORS,
+    content_cards_html,
+    cross_product_table_html,
+    cross_team_table_html,
+    engagement_table_html,
+    interactions_card_html,
+    member_card_html,
+    mix_chart_data,
+    query_searches_html,
+    searches_card_html,
+    stale_chart_data,
+    team_table_html,
+    teamspace_searches_html,
+    total_members_html,
+)
+from charts import CHART_CACHE, RENDERER, process_rss
+from event_store import DAY
+from profiling import PROFILES, RunProfile
+from snapshots import events_scheduler, preset_window
 
 def patch_st_markdown():
-    """Monkey-patch st.markdown to replace <div class="person-icon"></div> with inline base64 images."""
-    original_markdown = st.markdown
+    """Monkey-patch st.markdown to give each <div class="person-icon"></div> a stable avatar class.
 
-    # Load and base64‑encode all 5 images into a list
-    images_data = []
-    for i in range(1, 6):
-        with open(f'image{i}.png', 'rb') as f:
-            b64 = base64.b64encode(f.read()).decode()
-            images_data.append(b64)
+    The HTML bytes sent are counted in the current run's profile.
+    """
+    # st.markdown is process-wide and every run of every session calls this;
+    # patch it once and find the run's profile when markdown is called
+    if hasattr(st.markdown, "original_markdown"):
+        return
+    original_markdown = st.markdown
 
     def new_markdown(html, *args, **kwargs):
-        # Replace each <div class="person-icon"></div> with a random image
-        def replacer(match):
-            chosen = random.choice(images_data)
-            return (
-                f'<div class="person-icon" '
-                f'style="background: url(\'data:image/png;base64,{chosen}\') '
-                f'no-repeat center center; background-size: contain;"></div>'
-            )
-
-        # Run a regex that looks for exactly <div class="person-icon"></div>
-        new_html = re.sub(
-            r'<div\s+class="person-icon"\s*></div>',
-            replacer,
-            str(html)  # in case "html" is not already a string
-        )
+        # Avatars follow the name next to each icon; rendered fragments are memoized
+        new_html = tag_person_icons(str(html))  # in case "html" is not already a string
+        profile = st.session_state.get("run_profile")
+        if profile is not None:
+            profile.add("html_bytes", len(new_html.encode()))
         return original_markdown(new_html, *args, **kwargs)
 
     # Override st.markdown with our patched version
+    new_markdown.original_markdown = original_markdown
     st.markdown = new_markdown
 
+# Wall time and counters of each section in this run; kept in session state
+# for benchmarks/dashboard.py and summed into PROFILES when the run ends
+profile = RunProfile()
+st.session_state["run_profile"] = profile
+
 # Call the patch function so that st.markdown is replaced
 patch_st_markdown()
 
@@ -47,86 +66,93 @@ st.set_page_config(
 )
 
 # Custom CSS for styling - Dark Mode with updated colors, icon alignment, and using 'Inter'
-st.markdown(
+st.markdown(DASHBOARD_CSS, unsafe_allow_html=True)
+
+# Avatar images, defined once per page as CSS classes
+st.markdown(avatar_css(), unsafe_allow_html=True)
+
+
+# Time-range selector options (days back from the latest event; None = custom range)
+WINDOW_OPTIONS = {
+    "Last 7 Days": 7,
+    "Last 30 Days": 30,
+    "Last 90 Days": 90,
+    "Last 365 Days": 365,
+    "Custom": None,
+}
+DEFAULT_WINDOW = "Last 90 Days"
+
+
+@st.cache_resource
+def load_snapshots():
+    """The workspace's precomputed snapshots, shared by every session of the process.
+
+    NOTION_ANALYTICS_EVENTS may point at an event log directory or a single
+    segment file (both memory-mapped); without it a demo workspace is
+    generated. Every preset window's aggregates are built before the first
+    page is served and rebuilt in the background (every
+    NOTION_ANALYTICS_REFRESH_SECONDS) when an event log gets new segments;
+    sessions only ever read a finished snapshot. Custom ranges are computed
+    on demand and cached process-wide (see aggregates.AGGREGATES).
     """
-<style>
-    /* Global styling */
-    .stApp {
-        font-family: sans-serif;
-        background-color: #121212;
-        color: #e0e0e0;
-    }
-    /* Remove the sidebar completely */
-    [data-testid="stSidebar"] { dispalay: none; }
-
-    /* Main content area styling */
-    .main .block-container {
-        padding-top: 1rem;
-        padding-bottom: 1rem;
-    }
+    path = os.environ.get("NOTION_ANALYTICS_EVENTS")
+    interval = float(os.environ.get("NOTION_ANALYTICS_REFRESH_SECONDS", 60))
+    return events_scheduler(path, interval).start()
 
-    /* Card styling for sections */
-    .member-card {
-        background-color: #262626;
-        border-radius: 4px;
-        padding: 10px;
-        margin-bottom: 20px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.3);
-        color: #D4D4D4;
-    }
 
-    /* Dropdown styling for Last 90 Days */
-    .dropdown {
-        border: 1px solid #444444;
-        border-radius: 4px;
-        padding: 5px 10px;
-        font-size: 0.9rem;
-        background-color: #1B2028;
-        color: #2483E2;
-    }
+def kept(key, default):
+    """The value the widget called key had when last rendered (see keep), else default.
 
-    /* Icon placeholders */
-    .person-icon {
-        width: 20px;
-        height: 20px;
-        background-color: #555555;
-        border-radius: 50%;
-        margin-right: 10px;
-        display: inline-block;
-        vertical-align: middle;
-    }
-    .page-icon {
-        width: 20px;
-        height: 20px;
-        background-color: #555555;
-        border-radius: 5px;
-        margin-right: 10px;
-        display: inline-block;
-        vertical-align: middle;
-    }
-
-    /* Align text with icons */
-    .icon-text {
-        display: inline-block;
-        vertical-align: middle;
-    }
-
-    /* Responsive layout adjustments */
-    @media (max-width: 1200px) {
-        .stApp .block-container {
-            padding: 1rem;
-        }
-    }
-    @media (max-width: 992px) {
-        .main .block-container {
-            padding-top: 0.5rem;
-            padding-bottom: 0.5rem;
-        }
-    }
-</style>
-""",
-    unsafe_allow_html=True,
-)
+    Streamlit drops a widget's state on runs that don't render it, e.g. while
+    its lazy tab is closed; the copy kept under another key survives those.
+    """
+    return st.session_state.get(f"{key}_kept", default)
+
+
+def keep(key, value):
+    st.session_state[f"{key}_kept"] = value
+    return value
+
+
+def window_selector(key):
+    """Render a section's time-range dropdown and return its day-aligned [start, end) in seconds."""
+    with st.container(horizontal_alignment="right"):
+        choice = keep(key, st.selectbox(
+            "Time range",
+            list(WINDOW_OPTIONS),
+            index=list(WINDOW_OPTIONS).index(kept(key, DEFAULT_WINDOW)),
+            key=key,
+            label_visibility="collapsed",
+            width=160,
+        ))
+    last_day = store.end_time // DAY
+    days = WINDOW_OPTIONS[choice]
+    if days is not None:
+        return preset_window(store, days)
+
+    epoch = datetime.date(1970, 1, 1)
+    first_date = epoch + datetime.timedelta(days=store.start_time // DAY)
+    last_date = epoch + datetime.timedelta(days=last_day)
+    with st.container(horizontal_alignment="right"):
+        picked = keep(f"{key}_custom", st.date_input(
+            "Custom range",
+            # The last 30 days, or all of a shorter history
+            value=kept(f"{key}_custom", (max(first_date, last_date - datetime.timedelta(days=29)), last_date)),
+            min_value=first_date,
+            max_value=last_date,
+            key=f"{key}_custom",
+            label_visibility="collapsed",
+            width=220,
+        ))
+    # While the user is still picking, the range only has a start date
+    start_date, end_date = (picked[0], picked[-1]) if picked else (last_date, last_date)
+    return (start_date - epoch).days * DAY, ((end_date - epoch).days + 1) * DAY
+
+
+# One snapshot for the whole run, even if a newer one is swapped in meanwhile
+snapshots = load_snapshots()
+snapshot = snapshots.current
+store = snapshot.store
 
 
 # Top header (common across tabs)
@@ -138,879 +164,315 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Create tabs for Engagement, Collaboration, and Discovery
-engagement_tab, collaboration_tab, discovery_tab = st.tabs(["Engagement", "Collaboration", "Discovery"])
+# Tab name -> function rendering that tab's content, in tab order (see @section)
+SECTIONS = {}
+
+# Lazy mode only runs the open tab's section; set NOTION_ANALYTICS_LAZY_TABS=0 to run all three
+LAZY_TABS = os.environ.get("NOTION_ANALYTICS_LAZY_TABS", "1") != "0"
+
+
+def section(tab_name):
+    """Register the decorated function as the content of the tab called tab_name."""
+    def register(render):
+        SECTIONS[tab_name] = render
+        return render
+    return register
+
+
+# The diagnostics panel is hidden unless NOTION_ANALYTICS_DIAGNOSTICS=1 or the URL has ?diagnostics=1
+DIAGNOSTICS = os.environ.get("NOTION_ANALYTICS_DIAGNOSTICS", "0") == "1"
+# Prometheus text dump of the section metrics, rewritten after every run
+METRICS_FILE = os.environ.get("NOTION_ANALYTICS_METRICS_FILE")
+
+
+def process_gauges():
+    """Process-wide cache and renderer figures, exported next to the section metrics."""
+    chart_cache = CHART_CACHE.stats()
+    aggregates = AGGREGATES.stats()
+    renderer = RENDERER.stats()
+    fragments = tag_person_icons.cache_info()
+    return {
+        "chart_cache_entries": chart_cache["entries"],
+        "chart_cache_bytes": chart_cache["bytes"],
+        "chart_cache_hits": chart_cache["hits"],
+        "chart_cache_misses": chart_cache["misses"],
+        "chart_cache_evictions": chart_cache["evictions"],
+        "aggregate_cache_entries": aggregates["entries"],
+        "aggregate_cache_bytes": aggregates["bytes"],
+        "aggregate_cache_hits": aggregates["hits"],
+        "aggregate_cache_misses": aggregates["misses"],
+        "aggregate_cache_coalesced": aggregates["coalesced"],
+        "aggregate_cache_evictions": aggregates["evictions"],
+        "aggregate_cache_expirations": aggregates["expirations"],
+        "aggregate_cache_hit_rate": aggregates["hit_rate"],
+        "aggregate_compute_seconds": aggregates["compute_seconds"],
+        **snapshots.stats(),
+        "chart_renders": renderer["renders"],
+        "chart_render_seconds": renderer["render_seconds"],
+        "chart_figures_in_use": renderer["figures_in_use"],
+        "chart_figures_pooled": renderer["figures_pooled"],
+        "chart_figures_created": renderer["figures_created"],
+        "chart_pyplot_figures": renderer["pyplot_figures"],
+        "chart_worker_rss_bytes": renderer["worker_rss_bytes"],
+        "fragment_cache_hits": fragments.hits,
+        "fragment_cache_misses": fragments.misses,
+        "resident_memory_bytes": process_rss(),
+    }
+
+
+def render_diagnostics(profile, gauges):
+    """Per-section timings and counters of this run, plus the process-wide figures."""
+    with st.expander("Diagnostics", expanded=True):
+        rows = [
+            {
+                "section": key,
+                "wall ms": round(seconds * 1000, 1),
+                "render ms": round(profile.counters[key]["render_seconds"] * 1000, 1),
+                "html bytes": profile.counters[key]["html_bytes"],
+                "chart hits": profile.counters[key]["chart_cache_hits"],
+                "chart misses": profile.counters[key]["chart_cache_misses"],
+            }
+            for key, seconds in profile.times.items()
+        ]
+        st.dataframe(rows, hide_index=True)
+        st.json(gauges, expanded=False)
+        st.code(PROFILES.prometheus_text(gauges), language="text")
 
 # -------------------------------
 # ENGAGEMENT TAB CONTENT
 # ------------------------------
-with engagement_tab:
+@section("Engagement")
+def render_engagement():
     # Header and dropdown for Member Engagement
     col1, col2 = st.columns([2, 3])
     with col1:
         st.markdown("<h3>Member Engagement</h3>", unsafe_allow_html=True)
     with col2:
-        st.markdown(
-            '<div style="text-align: right;"><span class="dropdown">Last 90 Days <span style="font-size: 14px;">⌄</span></span></div>',
-            unsafe_allow_html=True,
-        )
+        window_start, window_end = window_selector("engagement_window")
 
-    # Total Members card
-    st.markdown(
-        """
-<div class="member-card" style="width: 100%;">
-    <h2 style="margin: 0;">Total Members <span style="float: right;">98</span></h2>
-    <p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">&gt;↗ 118% more than previous 90 days</p>
-</div>
-""",
-        unsafe_allow_html=True,
-    )
+    # Total Members card: members who had joined by the window's end vs by its start
+    member_cards = snapshot.aggregate("member_cards", window_start, window_end)
+    days = (window_end - window_start) // DAY
+    st.markdown(total_members_html(member_cards, days), unsafe_allow_html=True)
 
     # -------------------------------
     # Three current activity sections
     # -------------------------------
     col1, col2, col3 = st.columns(3)
 
-    # Current Active Members card
-    with col1:
-        st.markdown(
-            """
-        <div class="member-card">
-            <h4 style="margin-bottom: 10px;">Active Members <span style="float: right;">32</span></h4>
-            <div style="display: flex; align-items: center; font-weight: bold; margin-bottom: 10px;">
-                <div style="flex: 1; text-align: left;">Name</div>
-                <div style="flex: 1; text-align: left;"># Sessions</div>
-                <div style="flex: 1; text-align: left;">Top Teamspace</div>
-            </div>
-            <!-- For the Name column, using person-icon to denote people's names -->
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Alice</span></div>
-                <div style="flex: 1; text-align: left;">1010</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">General</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Bob</span></div>
-                <div style="flex: 1; text-align: left;">990</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Product</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Charlie</span></div>
-                <div style="flex: 1; text-align: left;">800</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Marketing</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Dana</span></div>
-                <div style="flex: 1; text-align: left;">500</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Finance</span></div>
-            </div>
-            <div style="display: flex; align-items: center;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Eve</span></div>
-                <div style="flex: 1; text-align: left;">210</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Engineering</span></div>
-            </div>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
-
-    # Current Active Contributors card
-    with col2:
-        st.markdown(
-            """
-        <div class="member-card">
-            <h4 style="margin-bottom: 10px;">Active Contributors <span style="float: right;">18</span></h4>
-            <div style="display: flex; align-items: center; font-weight: bold; margin-bottom: 10px;">
-                <div style="flex: 1; text-align: left;">Name</div>
-                <div style="flex: 1; text-align: left;"># Edits</div>
-                <div style="flex: 1; text-align: left;">Top Teamspace</div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Zoe</span></div>
-                <div style="flex: 1; text-align: left;">500</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Marketing</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Rebecca</span></div>
-                <div style="flex: 1; text-align: left;">565</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Analytics</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Fig</span></div>
-                <div style="flex: 1; text-align: left;">367</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Data</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Nicole Wu</span></div>
-                <div style="flex: 1; text-align: left;">278</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">HR</span></div>
-            </div>
-            <div style="display: flex; align-items: center;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Stephanie</span></div>
-                <div style="flex: 1; text-align: left;">109</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Strategy</span></div>
-            </div>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
-
-    # Current Active Creators card
-    with col3:
-        st.markdown(
-            """
-        <div class="member-card">
-            <h4 style="margin-bottom: 10px;">Active Creators <span style="float: right;">5</span></h4>
-            <div style="display: flex; align-items: center; font-weight: bold; margin-bottom: 10px;">
-                <div style="flex: 1; text-align: left;">Name</div>
-                <div style="flex: 1; text-align: left;"># Additions</div>
-                <div style="flex: 1; text-align: left;">Top Teamspace</div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Rebecca</span></div>
-                <div style="flex: 1; text-align: left;">50</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Engineering</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Fig</span></div>
-                <div style="flex: 1; text-align: left;">43</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Marketing</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Zoe</span></div>
-                <div style="flex: 1; text-align: left;">32</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Analytics</span></div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Sohrab A...</span></div>
-                <div style="flex: 1; text-align: left;">16</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">Data</span></div>
-            </div>
-            <div style="display: flex; align-items: center;">
-                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">Nicole Wu</span></div>
-                <div style="flex: 1; text-align: left;">9</div>
-                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">HR</span></div>
-            </div>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
+    # Current Active Members / Contributors / Creators cards
+    # (active counts are unions of the daily distinct-count sketches)
+    cards = [
+        (col1, "Active Members", "# Sessions", "members"),
+        (col2, "Active Contributors", "# Edits", "contributors"),
+        (col3, "Active Creators", "# Additions", "creators"),
+    ]
+    # (members are listed by their number of sessions, the others by event count)
+    for col, title, column_label, activity in cards:
+        with col:
+            card = member_cards["cards"][activity]
+            st.markdown(member_card_html(title, card["active"], column_label, card["top"]), unsafe_allow_html=True)
+    profile.lap("member_cards")
 
     # -------------------------------
     # Charts for each activity section
     # -------------------------------
     col1_chart, col2_chart, col3_chart = st.columns(3)
 
-    # Common chart parameters
-    chart_height = 1.5
-    chart_width = 4
-    font_size = 7
-
-    # Chart for Current Active Members
-    with col1_chart:
-        fig, ax = plt.subplots(figsize=(chart_width, chart_height))
-        fig.patch.set_facecolor("#262626")
-        ax.set_facecolor("#262626")
-        x = np.linspace(0, 9, 10)
-        # Simulated upward data with fluctuations matching a max of 32
-        y = np.array([9, 9, 7, 8, 10, 15, 17, 21, 26, 32])
-
-        # Add title to match section header styling
-        title_fontsize = 9  # Match h4 size from section above
-        plt.figtext(
-            0.05,  # X position - aligned with left edge of plot
-            0.95,  # Y position - top of the figure
-            "Active Members over time",
-            fontsize=title_fontsize,
-            color="#D4D4D4",
-            fontweight="medium",
-            ha="left",
-        )
-
-        ax.fill_between(x, y, color="#e0f0ff", alpha=0.5)
-        ax.plot(x, y, color="#80bfff")
-        ax.set_ylim(0, 32)
-        ax.set_yticks(np.linspace(0, 32, 5))
-        ax.set_xticks(np.linspace(x.min(), x.max(), 15))
-        ax.set_xticklabels([])
-        ax.tick_params(axis="y", colors="#D4D4D4", labelsize=font_size)
-        ax.tick_params(axis="x", colors="#262626")
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-
-        # Adjust plot margins to make room for the title
-        plt.subplots_adjust(top=0.8)
-        st.pyplot(fig)
-
-    # Chart for Current Active Contributors
-    with col2_chart:
-        fig, ax = plt.subplots(figsize=(chart_width, chart_height))
-        fig.patch.set_facecolor("#262626")
-        ax.set_facecolor("#262626")
-        x = np.linspace(0, 9, 10)
-        y = np.array([8, 10, 11, 12, 15, 15, 15, 17, 17, 18])
-
-        # Add title to match section header styling
-        title_fontsize = 9  # Match h4 size from section above
-        plt.figtext(
-            0.05,  # X position - aligned with left edge of plot
-            0.95,  # Y position - top of the figure
-            "Active Contributors over time",
-            fontsize=title_fontsize,
-            color="#D4D4D4",
-            fontweight="medium",
-            ha="left",
-        )
-
-        ax.fill_between(x, y, color="#e0f0ff", alpha=0.5)
-        ax.plot(x, y, color="#80bfff")
-        ax.set_ylim(0, 18)
-        ax.set_yticks(np.linspace(0, 18, 4))
-        ax.set_xticks(np.linspace(x.min(), x.max(), 15))
-        ax.set_xticklabels([])
-        ax.tick_params(axis="y", colors="#D4D4D4", labelsize=font_size)
-        ax.tick_params(axis="x", colors="#262626")
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-
-        # Adjust plot margins to make room for the title
-        plt.subplots_adjust(top=0.8)
-        st.pyplot(fig)
-
-    # Chart for Current Active Creators
-    with col3_chart:
-        fig, ax = plt.subplots(figsize=(chart_width, chart_height))
-        fig.patch.set_facecolor("#262626")
-        ax.set_facecolor("#262626")
-        x = np.linspace(0, 9, 10)
-        y = np.array([4, 4, 4, 4, 4, 5, 5, 4, 4, 5])
-
-        # Add title to match section header styling
-        title_fontsize = 9  # Match h4 size from section above
-        plt.figtext(
-            0.05,  # X position - aligned with left edge of plot
-            0.95,  # Y position - top of the figure
-            "Active Creators over time",
-            fontsize=title_fontsize,
-            color="#D4D4D4",
-            fontweight="medium",
-            ha="left",
-        )
-
-        ax.fill_between(x, y, color="#e0f0ff", alpha=0.5)
-        ax.plot(x, y, color="#80bfff")
-        ax.set_ylim(0, 5)
-        ax.set_yticks(np.linspace(0, 5, 6))
-        ax.set_xticks(np.linspace(x.min(), x.max(), 15))
-        ax.set_xticklabels([])
-        ax.tick_params(axis="y", colors="#D4D4D4", labelsize=font_size)
-        ax.tick_params(axis="x", colors="#262626")
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-
-        # Adjust plot margins to make room for the title
-        plt.subplots_adjust(top=0.8)
-        st.pyplot(fig)
+    # Charts for Current Active Members / Contributors / Creators
+    charts = [
+        (col1_chart, "Active Members over time", "members"),
+        (col2_chart, "Active Contributors over time", "contributors"),
+        (col3_chart, "Active Creators over time", "creators"),
+    ]
+    # One point per day (from the rollup); the chart thins them out to its pixel width.
+    # Submit all three first so they render in parallel, then place them
+    series = snapshot.aggregate("activity_series", window_start, window_end)
+    images = [RENDERER.submit("area", {"title": title, "y": series[activity]}) for _, title, activity in charts]
+    for (col, _, _), image in zip(charts, images):
+        with col:
+            st.image(profile.chart(image), width="stretch")
+    profile.lap("charts")
     # -------------------------------
     # Content Engagement Section
     # -------------------------------
     st.markdown("<h3>Content Engagement</h3>", unsafe_allow_html=True)
     col1_ce, col2_ce = st.columns(2)
+    engagement = snapshot.aggregate("content_engagement", window_start, window_end)
+    pages_card, sessions_card = content_cards_html(engagement)
     with col1_ce:
-        st.markdown(
-            """
-        <div class="member-card" style="width: 100%;">
-            <h2 style="margin: 0;">Total Pages <span style="float: right;">12</span></h2>
-            <p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">> Active Pages: 6</p>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(pages_card, unsafe_allow_html=True)
     with col2_ce:
-        st.markdown(
-            """
-        <div class="member-card" style="width: 100%;">
-            <h2 style="margin: 0;">Total Sessions <span style="float: right;">126</span></h2>
-            <p style="font-size: 0.9rem;color: #4caf50; margin-top: 1px;">> Active Sessions: 56</p>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(sessions_card, unsafe_allow_html=True)
 
-    # Content Engagement Details Table
-    pages = [
-        "General", "Product", "Finance", "People", "Engineering", "Marketing",
-        "Analytics", "Data", "HR", "Strategy", "Operations", "BizOps"
-    ]
-    top_members = ["Alice", "Bob", "Charlie", "Dana", "Eve", "Frank", "Grace", "Hank", "Ivy", "Jack"]
-    top_contributors = ["Zoe", "Liam", "Emma", "Noah", "Olivia", "Ava", "William", "Sophia", "Mason", "Isabella"]
-
-    table_html = """
-<table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
-  <tr style="text-align: left; border-bottom: 1px solid #444444;">
-    <th style="padding: 8px;">Page Name</th>
-    <th style="padding: 8px;">Top Member</th>
-    <th style="padding: 8px;">Top Contributor</th>
-    <th style="padding: 8px;">Avg Scroll Depth</th>
-    <th style="padding: 8px;">Avg Time Spent (min)</th>
-  </tr>
-    """
-    for page in pages:
-        scroll_depth = random.randint(0, 100)
-        avg_time = random.randint(1, 15)
-        member = random.choice(top_members)
-        contributor = random.choice(top_contributors)
-        progress_html = f"""
-    <div style="width: 100%; background-color: #555555; height: 10px; border-radius: 5px; margin-bottom: 2px;">
-        <div style="width: {scroll_depth}%; background-color: #4caf50; height: 10px; border-radius: 5px;"></div>
-    </div>
-    <span style="font-size: 0.8rem;">{scroll_depth}%</span>
-    """
-        table_html += f"""
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{page}</span></td>
-    <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">{member}</span></td>
-    <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">{contributor}</span></td>
-    <td style="padding: 8px;">{progress_html}</td>
-    <td style="padding: 8px;">{avg_time} min</td>
-  </tr>
-  """
-    table_html += "</table>"
-    st.markdown(table_html, unsafe_allow_html=True)
+    # Content Engagement Details Table: the most viewed pages, with each page's
+    # most frequent viewer and editor and its scroll depth / dwell time spread
+    st.markdown(engagement_table_html(engagement), unsafe_allow_html=True)
+    profile.lap("content_engagement")
 
 
 # -------------------------------
 # COLLABORATION TAB CONTENT
 # -------------------------------
-with collaboration_tab:
+@section("Collaboration")
+def render_collaboration():
     # Header and dropdown for Team-specific view
     col1_col, col2_col = st.columns([1, 4])
     with col1_col:
         st.markdown("<h3>Team-Specific</h3>", unsafe_allow_html=True)
     with col2_col:
-        st.markdown(
-            '<div style="text-align: right;"><span class="dropdown">Last 90 Days <span style="font-size: 14px;">⌄</span></span></div>',
-            unsafe_allow_html=True,
-        )
+        team_window = window_selector("team_window")
 
     # Split the row into two columns: left for Active Team Interactions card, right for donut chart
     # Adjust the ratio so the left section is larger and the right chart is smaller
     col_left, col_right = st.columns([4.5, 2])
+    team = snapshot.aggregate("team_interactions", *team_window)
+    team_days = (team_window[1] - team_window[0]) // DAY
+    # The interactions mix donut renders while the card is sent
+    team_mix = mix_chart_data(team["mix"], TEAM_MIX_COLORS)
+    team_mix = None if team_mix is None else RENDERER.submit("donut", team_mix)
 
     # Left column: Active Team Interactions Card (increased min-height)
     with col_left:
         st.markdown(
-            """
-<div class="member-card" style="width: 100%; min-height: 240px;">
-    <h2 style="margin: 0;">Active Team Interactions <span style="float: right;">1745</span></h2>
-    <p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">&gt;↗ 426% more than previous 90 days</p>
-</div>
-""",
+            interactions_card_html("Active Team Interactions", team["interactions"], team["change"], f"previous {team_days} days"),
             unsafe_allow_html=True,
         )
 
     # Right column: Donut Chart showing the interactions mix (smaller donut size and label size)
     with col_right:
-        import matplotlib.pyplot as plt
+        if team_mix is not None:
+            st.image(profile.chart(team_mix), width="stretch")
 
-        # Sample distribution of interactions (Edits has highest share)
-        labels = [
-            "Edits", "Comments", "Reactions", "Mentions",
-            "Shares", "Kanbans", "Tasks", "Databases"
-        ]
-        sizes = [30, 20, 15, 10, 10, 9, 6, 5]  # Total 100
-        # Darker-to-lighter pastel blues
-        colors = [
-            "#7DA7C7", "#8FBED6", "#9FD3E6", "#AADFF0",
-            "#B3E5F2", "#BCE9F4", "#C6EDF6", "#D0F2F9"
-        ]
-
-        fig, ax = plt.subplots(figsize=(1.5, 1.1))  # Reduced size
-        fig.patch.set_facecolor("none")
-        ax.set_facecolor("none")
-
-        # Create the donut chart without percentage labels, with smaller text
-        wedges, texts = ax.pie(
-            sizes,
-            labels=labels,
-            colors=colors,
-            startangle=140,
-            textprops={"fontsize": 4, "color": "#e0e0e0"},  # Reduced font size
-        )
-        # Create the donut hole
-        centre_circle = plt.Circle((0, 0), 0.70, fc="#121212")
-        fig.gca().add_artist(centre_circle)
-
-        ax.axis("equal")  # Ensures the pie is drawn as a circle
-        st.pyplot(fig)
-
-    
-    # Collaboration-specific Analytics Table
-    table_html = """
-<table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
-  <tr style="text-align: left; border-bottom: 1px solid #444444;">
-    <th style="padding: 8px;">Current Team Page</th>
-    <th style="padding: 8px;"># Unique Collaborators</th>
-    <th style="padding: 8px;">Total Interactions</th>
-    <th style="padding: 8px;">Interactions Trend</th>
-    <th style="padding: 8px;">Top Collaborator</th>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Product Roadmap</span>
-    </td>
-    <td style="padding: 8px;">12</td>
-    <td style="padding: 8px;">256</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+35%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Alice</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Product Updates</span>
-    </td>
-    <td style="padding: 8px;">15</td>
-    <td style="padding: 8px;">340</td>
-    <td style="padding: 8px;"><span style="color: red;">-20%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Bob</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Feature Releases</span>
-    </td>
-    <td style="padding: 8px;">17</td>
-    <td style="padding: 8px;">512</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+45%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Charlie</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Beta Testing</span>
-    </td>
-    <td style="padding: 8px;">11</td>
-    <td style="padding: 8px;">478</td>
-    <td style="padding: 8px;"><span style="color: red;">-10%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Dana</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Product Design</span>
-    </td>
-    <td style="padding: 8px;">14</td>
-    <td style="padding: 8px;">690</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+80%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Eve</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">User Feedback</span>
-    </td>
-    <td style="padding: 8px;">16</td>
-    <td style="padding: 8px;">820</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+120%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Frank</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Quality Assurance</span>
-    </td>
-    <td style="padding: 8px;">13</td>
-    <td style="padding: 8px;">305</td>
-    <td style="padding: 8px;"><span style="color: red;">-15%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Grace</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Product Metrics</span>
-    </td>
-    <td style="padding: 8px;">18</td>
-    <td style="padding: 8px;">765</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+60%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Hank</span>
-    </td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444;">
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Innovation Lab</span>
-    </td>
-    <td style="padding: 8px;">10</td>
-    <td style="padding: 8px;">410</td>
-    <td style="padding: 8px;"><span style="color: red;">-25%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Ivy</span>
-    </td>
-  </tr>
-  <tr>
-    <td style="padding: 8px;">
-        <div class="page-icon"></div><span class="icon-text">Product Strategy</span>
-    </td>
-    <td style="padding: 8px;">19</td>
-    <td style="padding: 8px;">980</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+95%</span></td>
-    <td style="padding: 8px;">
-        <div class="person-icon"></div><span class="icon-text">Jack</span>
-    </td>
-  </tr>
-</table>
-"""
-    st.markdown(table_html, unsafe_allow_html=True)
+    # Collaboration-specific Analytics Table: the pages with most collaboration,
+    # their distinct collaborators and top collaborator, all from the sketches
+    st.markdown(team_table_html(team), unsafe_allow_html=True)
+    profile.lap("team_specific")
     # Header and dropdown for Team-specific view
     col1_col, col2_col = st.columns([1, 4])
     with col1_col:
         st.markdown("<h3>Cross-Team</h3>", unsafe_allow_html=True)
     with col2_col:
-        st.markdown(
-            '<div style="text-align: right;"><span class="dropdown">Last 90 Days <span style="font-size: 14px;">⌄</span></span></div>',
-            unsafe_allow_html=True,
-        )
+        cross_team_window = window_selector("cross_team_window")
 
     # Split the row into two columns: left for Active Team Interactions card, right for donut chart
     # Adjust the ratio so the left section is larger and the right chart is smaller
     col_left, col_right = st.columns([4.5, 2])
+    cross_team = snapshot.aggregate("cross_team", *cross_team_window)
+    cross_team_days = (cross_team_window[1] - cross_team_window[0]) // DAY
+    cross_team_mix = mix_chart_data(cross_team["mix"], CROSS_TEAM_MIX_COLORS)
+    cross_team_mix = None if cross_team_mix is None else RENDERER.submit("donut", cross_team_mix)
 
     # Left column: Active Team Interactions Card (increased min-height)
     with col_left:
         st.markdown(
-            """
-<div class="member-card" style="width: 100%; min-height: 240px;">
-    <h2 style="margin: 0;">Cross Team Interactions <span style="float: right;">454</span></h2>
-    <p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">&gt;↗ 67% more than previous 90 days</p>
-</div>
-""",
+            interactions_card_html("Cross Team Interactions", cross_team["interactions"], cross_team["change"], f"previous {cross_team_days} days"),
             unsafe_allow_html=True,
         )
 
     # Right column: Donut Chart showing the interactions mix (smaller donut size and label size)
     with col_right:
-        import matplotlib.pyplot as plt
-
-        # Sample distribution of interactions (Edits has highest share)
-        labels = [
-            "Edits", "Comments", "Reactions", "Mentions",
-            "Shares", "Kanbans", "Tasks", "Databases"
-        ]
-        sizes = [5, 25, 20, 20, 10, 5, 5, 10]  # Total 100
-        # Darker-to-lighter pastel blues
-        colors = [
-            "#A8E6CF", "#B2F2D2", "#BBF8D7", "#C4FFD9", "#CCFFDF", 
-            "#D5FFE3", "#DEFFE7", "#E7FFEB"
-        ]
-
-        fig, ax = plt.subplots(figsize=(1.5, 1.1))  # Reduced size
-        fig.patch.set_facecolor("none")
-        ax.set_facecolor("none")
-
-        # Create the donut chart without percentage labels, with smaller text
-        wedges, texts = ax.pie(
-            sizes,
-            labels=labels,
-            colors=colors,
-            startangle=140,
-            textprops={"fontsize": 4, "color": "#e0e0e0"},  # Reduced font size
-        )
-        # Create the donut hole
-        centre_circle = plt.Circle((0, 0), 0.70, fc="#121212")
-        fig.gca().add_artist(centre_circle)
-
-        ax.axis("equal")  # Ensures the pie is drawn as a circle
-        st.pyplot(fig)
-    
-        table_html = """
-    <table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
-    <tr style="text-align: left; border-bottom: 1px solid #444444;">
-        <th style="padding: 8px;">Teamspace</th>
-        <th style="padding: 8px;">Shared Content</th>
-        <th style="padding: 8px;">Shared with</th>
-        <th style="padding: 8px;">Top Collaborator</th>
-        <th style="padding: 8px;">Interactions</th>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Product</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Product Roadmap</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Marketing</span></td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Alice</span></td>
-        <td style="padding: 8px;">980</td>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Engineering</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Sprint Overview</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Product</span></td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Bob</span></td>
-        <td style="padding: 8px;">865</td>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Finance</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Budget Report</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Operations</span></td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Charlie</span></td>
-        <td style="padding: 8px;">750</td>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">HR</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Employee Handbook</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">People</span></td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Dana</span></td>
-        <td style="padding: 8px;">620</td>
-    </tr>
-    <tr>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Analytics</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Data Insights</span></td>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Strategy</span></td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Eve</span></td>
-        <td style="padding: 8px;">510</td>
-    </tr>
-    </table>
-    """
-    st.markdown(table_html, unsafe_allow_html=True)
+        if cross_team_mix is not None:
+            st.image(profile.chart(cross_team_mix), width="stretch")
+    st.markdown(cross_team_table_html(cross_team), unsafe_allow_html=True)
+    profile.lap("cross_team")
     # Header and dropdown for Team-specific view
     col1_col, col2_col = st.columns([1, 4])
     with col1_col:
         st.markdown("<h3>Cross-Product</h3>", unsafe_allow_html=True)
     with col2_col:
-        st.markdown(
-            '<div style="text-align: right;"><span class="dropdown">Last 90 Days <span style="font-size: 14px;">⌄</span></span></div>',
-            unsafe_allow_html=True,
-        )
+        cross_product_window = window_selector("cross_product_window")
 
     # Split the row into two columns: left for Active Team Interactions card, right for donut chart
     # Adjust the ratio so the left section is larger and the right chart is smaller
     col_left, col_right = st.columns([4.5, 2])
+    cross_product = snapshot.aggregate("cross_product", *cross_product_window)
+    cross_product_days = (cross_product_window[1] - cross_product_window[0]) // DAY
+    cross_product_mix = mix_chart_data(cross_product["mix"], CROSS_PRODUCT_MIX_COLORS)
+    cross_product_mix = None if cross_product_mix is None else RENDERER.submit("donut", cross_product_mix)
 
     # Left column: Active Team Interactions Card (increased min-height)
     with col_left:
         st.markdown(
-            """
-<div class="member-card" style="width: 100%; min-height: 240px;">
-    <h2 style="margin: 0;">Cross Product Integrations <span style="float: right;">110</span></h2>
-    <p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">&gt;↗ 27% more than previous 90 days</p>
-</div>
-""",
+            interactions_card_html(
+                "Cross Product Integrations", cross_product["integrations"], cross_product["change"], f"previous {cross_product_days} days"
+            ),
             unsafe_allow_html=True,
         )
 
     # Right column: Donut Chart showing the interactions mix (smaller donut size and label size)
     with col_right:
-        import matplotlib.pyplot as plt
-
-        # Sample distribution of interactions (Edits has highest share)
-        labels = [
-            "Figma", "Slack", "Github"
-        ]
-        sizes = [60, 30, 10]  # Total 100
-        # Darker-to-lighter pastel green
-        colors = [
-         "#FFF9C4", "#FFF59D", "#FFF176"
-        ]
-
-        fig, ax = plt.subplots(figsize=(1.5, 1.1))  # Reduced size
-        fig.patch.set_facecolor("none")
-        ax.set_facecolor("none")
-
-        # Create the donut chart without percentage labels, with smaller text
-        wedges, texts = ax.pie(
-            sizes,
-            labels=labels,
-            colors=colors,
-            startangle=140,
-            textprops={"fontsize": 4, "color": "#e0e0e0"},  # Reduced font size
-        )
-        # Create the donut hole
-        centre_circle = plt.Circle((0, 0), 0.70, fc="#121212")
-        fig.gca().add_artist(centre_circle)
-
-        ax.axis("equal")  # Ensures the pie is drawn as a circle
-        st.pyplot(fig)
-        table_html = """
-    <table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
-    <tr style="text-align: left; border-bottom: 1px solid #444444;">
-        <th style="padding: 8px;">Teamspace</th>
-        <th style="padding: 8px;">Number of Integrations</th>
-        <th style="padding: 8px;">Top Integration</th>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Engineering</span></td>
-        <td style="padding: 8px;">25</td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Github</span></td>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Product</span></td>
-        <td style="padding: 8px;">22</td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Figma</span></td>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Marketing</span></td>
-        <td style="padding: 8px;">18</td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Slack</span></td>
-    </tr>
-    <tr style="border-bottom: 1px solid #444444;">
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Finance</span></td>
-        <td style="padding: 8px;">14</td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Github</span></td>
-    </tr>
-    <tr>
-        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">General</span></td>
-        <td style="padding: 8px;">10</td>
-        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">Figma</span></td>
-    </tr>
-    </table>
-    """
-    st.markdown(table_html, unsafe_allow_html=True)
+        if cross_product_mix is not None:
+            st.image(profile.chart(cross_product_mix), width="stretch")
+    st.markdown(cross_product_table_html(cross_product), unsafe_allow_html=True)
+    profile.lap("cross_product")
 
 
 # -------------------------------
 # DISCOVERY TAB CONTENT
 # -------------------------------
-with discovery_tab:
+@section("Discovery")
+def render_discovery():
     # Top Header with Last 90 Days dropdown
     col1_dis, col2_dis = st.columns([1, 4])
     with col1_dis:
         st.markdown("<h3>Discovery</h3>", unsafe_allow_html=True)
     with col2_dis:
-        st.markdown(
-            '<div style="text-align: right;"><span class="dropdown">Last 90 Days <span style="font-size: 14px;">⌄</span></span></div>',
-            unsafe_allow_html=True,
-        )
+        discovery_window = window_selector("discovery_window")
 
     # Top Section: Total Searches Card
-    st.markdown("""
-<div class="member-card" style="width: 100%; min-height: 180px;">
-    <h2 style="margin: 0;">Total Searches <span style="float: right;">148</span></h2>
-    <p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">&gt;↗ +5% more than previous 90 days</p>
-</div>
-""", unsafe_allow_html=True)
+    searches = snapshot.aggregate("searches", *discovery_window)
+    discovery_days = (discovery_window[1] - discovery_window[0]) // DAY
+    st.markdown(searches_card_html(searches, discovery_days), unsafe_allow_html=True)
 
     # Section Heading: Searches by Teamspace
     st.markdown("<h4>Searches by Teamspace</h4>", unsafe_allow_html=True)
-    st.markdown("""
-<table style="width: 100%; border-collapse: collapse; margin-top: 10px;">
-  <tr style="text-align: left; border-bottom: 1px solid #444444; font-size: 12px;">
-    <th style="padding: 8px;">Teamspace</th>
-    <th style="padding: 8px;"># Searches</th>
-    <th style="padding: 8px;">Search Trend</th>
-    <th style="padding: 8px;">Top Searched Page</th>
-    <th style="padding: 8px;">Top Searches</th>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">General</span></td>
-    <td style="padding: 8px;">250</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+5%</span></td>
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Company Announcements</span></td>
-    <td style="padding: 8px;">Latest updates</td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Product</span></td>
-    <td style="padding: 8px;">200</td>
-    <td style="padding: 8px;"><span style="color: red;">-3%</span></td>
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Product Roadmap</span></td>
-    <td style="padding: 8px;">New features</td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Finance</span></td>
-    <td style="padding: 8px;">180</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+2%</span></td>
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Budget Overview</span></td>
-    <td style="padding: 8px;">Quarterly Report</td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Engineering</span></td>
-    <td style="padding: 8px;">150</td>
-    <td style="padding: 8px;"><span style="color: red;">-1%</span></td>
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Sprint Planning</span></td>
-    <td style="padding: 8px;">Tech Innovations</td>
-  </tr>
-  <tr style="font-size: 12px;">
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Marketing</span></td>
-    <td style="padding: 8px;">120</td>
-    <td style="padding: 8px;"><span style="color: #4caf50;">+7%</span></td>
-    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">Campaign Metrics</span></td>
-    <td style="padding: 8px;">Ad Performance</td>
-  </tr>
-</table>
-""", unsafe_allow_html=True)
+    st.markdown(teamspace_searches_html(searches), unsafe_allow_html=True)
 
     # Section Heading: Searches by Content
     st.markdown("<h4>Searches by Content</h4>", unsafe_allow_html=True)
-    st.markdown("""
-<table style="width: 100%; border-collapse: collapse; margin-top: 10px;">
-  <tr style="text-align: left; border-bottom: 1px solid #444444; font-size: 12px;">
-    <th style="padding: 8px;">Top Searches</th>
-    <th style="padding: 8px;"># Searches</th>
-    <th style="padding: 8px;">Click-through Rate</th>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;">Budget Forecast</td>
-    <td style="padding: 8px;">300</td>
-    <td style="padding: 8px;">25%</td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;">Product Updates</td>
-    <td style="padding: 8px;">280</td>
-    <td style="padding: 8px;">0%</td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;">Engineering Roadmap</td>
-    <td style="padding: 8px;">260</td>
-    <td style="padding: 8px;">15%</td>
-  </tr>
-  <tr style="border-bottom: 1px solid #444444; font-size: 12px;">
-    <td style="padding: 8px;">Marketing Trends</td>
-    <td style="padding: 8px;">240</td>
-    <td style="padding: 8px;">10%</td>
-  </tr>
-  <tr style="font-size: 12px;">
-    <td style="padding: 8px;">HR Policies</td>
-    <td style="padding: 8px;">220</td>
-    <td style="padding: 8px;">0%</td>
-  </tr>
-</table>
-""", unsafe_allow_html=True)
-
-        # Section Heading: Stale Content Watch
-    st.markdown("<h4>Stale Content Watch</h4>", unsafe_allow_html=True)
-    import matplotlib.pyplot as plt
-    import numpy as np
-
-    pages = ["Company Handbook", "Old Product Page", "Legacy Budget", "Archived Meeting", "Deprecated FAQ"]
-    days_since_viewed = [50, 38, 32, 27, 20]
-
-    # Increase figure height to give more room for labels
-    fig, ax = plt.subplots(figsize=(5.5, 1))
-    fig.patch.set_facecolor("none")
-    ax.set_facecolor("none")
-
-    y_pos = np.arange(len(pages))
-    bar_colors = "#A8E6CF"  # Pastel green color
-    bars = ax.barh(y_pos, days_since_viewed, height=0.3, color=bar_colors)
-
-    ax.set_yticks(y_pos)
-    # Left-align the labels; add more padding to avoid overlap
-    ax.set_yticklabels(pages, fontsize=4, color="#666666", ha='left')
-    ax.tick_params(axis='y', which='both', length=0, pad=60)  # Increase pad to move labels left
+    st.markdown(query_searches_html(searches), unsafe_allow_html=True)
 
-    ax.invert_yaxis()  # highest value on top
-    ax.set_xlabel("Days Since Last Viewed", fontsize=4, color="#666666")
-
-    # Remove tick marks from x-axis while keeping the numbers
-    ax.tick_params(axis="x", which="both", length=0, labelsize=4, colors="#666666")
-
-    # Remove spines (borders)
-    for spine in ax.spines.values():
-        spine.set_visible(False)
-
-    # Optionally adjust subplot to ensure labels aren’t clipped
-    plt.subplots_adjust(left=0.25, right=0.95)
+    profile.lap("searches")
+    # Section Heading: Stale Content Watch
+    st.markdown("<h4>Stale Content Watch</h4>", unsafe_allow_html=True)
+    teamspaces = [None, *range(len(store.teamspaces))]
+    teamspace = keep("stale_teamspace", st.selectbox(
+        "Teamspace",
+        teamspaces,
+        index=teamspaces.index(kept("stale_teamspace", None)),
+        format_func=lambda code: "All teamspaces" if code is None else store.teamspaces[code],
+        key="stale_teamspace",
+        label_visibility="collapsed",
+        width=200,
+    ))
+    stale = snapshot.aggregate("stale_content", teamspace)
+    chart = stale_chart_data(stale)
+    if chart is not None:
+        st.image(profile.chart(RENDERER.submit("barh", chart)), width="stretch")
+    if stale["never_viewed"]:
+        st.caption(f"{stale['never_viewed']} pages have never been viewed.")
+    profile.lap("stale_content")
+
+
+profile.lap("page")
+
+# Create tabs for Engagement, Collaboration, and Discovery. In lazy mode the
+# tabs rerun the script on change and only the open tab's section is computed.
+tabs = st.tabs(list(SECTIONS), key="active_tab", on_change="rerun" if LAZY_TABS else "ignore")
+for tab, (tab_name, render) in zip(tabs, SECTIONS.items()):
+    if not LAZY_TABS or tab.open:
+        with tab:
+            profile.start(tab_name)
+            render()
+            profile.stop()
 
-    st.pyplot(fig)
+# -------------------------------
+# DIAGNOSTICS
+# -------------------------------
+PROFILES.record(profile)
+gauges = process_gauges()
+if METRICS_FILE:
+    PROFILES.write_prometheus(METRICS_FILE, gauges)
+if DIAGNOSTICS or st.query_params.get("diagnostics") == "1":
+    render_diagnostics(profile, gauges)
@@ -0,0 +1,439 @@
+import copy
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from event_store import DAY, EventType
+from metrics import (
+    COLLABORATION,
+    INTERACTION_NAMES,
+    MEMBER_ACTIVITY,
+    TeamspaceInteractions,
+    active_series,
+    member_home_teamspaces,
+    page_activity,
+    top_actors,
+    top_teamspaces,
+)
+from rollup import DailyRollup
+from search import SearchClicks
+from sessions import Sessions
+from sketches import DistinctCounts, HeavyHitters, PageHistograms
+from staleness import LastViewed
+from trends import Trends
+
+# Index name -> how to build it from a Workspace (see Workspace.__getattr__)
+INDEXES = {
+    "rollup": lambda workspace: DailyRollup.build(workspace.store),
+    "heavy_hitters": lambda workspace: HeavyHitters.build(workspace.store),
+    "distinct_counts": lambda workspace: DistinctCounts.build(workspace.store),
+    "page_histograms": lambda workspace: PageHistograms.build(workspace.store),
+    "sessions": lambda workspace: Sessions.build(workspace.store),
+    "search_clicks": lambda workspace: SearchClicks.build(workspace.store),
+    "last_viewed": lambda workspace: LastViewed.build(workspace.store),
+    "member_home": lambda workspace: member_home_teamspaces(workspace.store, workspace.rollup),
+    "trends": lambda workspace: Trends.build(workspace.store, member_home=workspace.member_home),
+}
+
+
+class AggregateCache:
+    """Process-wide, thread-safe cache of computed aggregates.
+
+    get(key, compute) returns the cached value or calls compute() for it.
+    Concurrent gets of a key that is being computed wait for that one
+    computation instead of starting their own (single flight), so fifty
+    sessions opening the same tab cost one computation. Entries expire
+    ttl seconds after they were computed, and the least recently used ones
+    are evicted to keep their (estimated) size within max_bytes.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=600, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        # key -> (value, size, expires at), least recently used first
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.compute_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, size, expires = entry
+                if self.clock() < expires:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.size -= size
+                self.expirations += 1
+            future = self.pending.get(key)
+            computing = future is None
+            if computing:
+                self.misses += 1
+                future = self.pending[key] = Future()
+            else:
+                self.coalesced += 1
+        if not computing:
+            return future.result()
+
+        start = self.clock()
+        try:
+            value = compute()
+        except BaseException as error:
+            # Waiters get the error too; nothing is cached, so the next get retries
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(error)
+            raise
+        self._put(key, value, start)
+        future.set_result(value)
+        return value
+
+    def _put(self, key, value, start):
+        size = sizeof(value)
+        now = self.clock()
+        with self.lock:
+            del self.pending[key]
+            self.compute_seconds += now - start
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size, now + self.ttl)
+            self.size += size
+            # Evict least recently used aggregates until we fit the budget again
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "compute_seconds": self.compute_seconds,
+                # Coalesced gets were served without a computation of their own
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+def sizeof(value):
+    """Approximate bytes held by an aggregate: arrays by nbytes, containers recursively."""
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (0 if value.base is None else value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+# One cache per process, shared by every session's reruns
+AGGREGATES = AggregateCache(
+    max_bytes=int(float(os.environ.get("NOTION_ANALYTICS_AGGREGATE_CACHE_MB", 64)) * 1024 * 1024),
+    ttl=float(os.environ.get("NOTION_ANALYTICS_AGGREGATE_TTL", 600)),
+)
+
+
+class Workspace:
+    """An event store plus the indexes its aggregates are computed from.
+
+    Indexes (see INDEXES) are attributes built on first use, once even when
+    sessions ask concurrently. aggregate() computes a metric through the
+    shared AGGREGATES cache, keyed by the workspace, the metric and its
+    arguments (the time window). The key includes the store's size, so
+    aggregates of an older copy of the log are never served for a newer one.
+    """
+
+    def __init__(self, store, name="workspace", cache=None):
+        self.store = store
+        self.name = name
+        self.cache = AGGREGATES if cache is None else cache
+        # Reentrant: building an index may build the ones it depends on
+        self.lock = threading.RLock()
+
+    def __getattr__(self, name):
+        if name not in INDEXES:
+            raise AttributeError(name)
+        with self.lock:
+            if name not in self.__dict__:
+                self.__dict__[name] = INDEXES[name](self)
+        return self.__dict__[name]
+
+    @property
+    def key(self):
+        return (self.name, len(self.store), self.store.end_time)
+
+    def updated(self, store):
+        """A Workspace for store (this one's log plus newer events), leaving this one untouched.
+
+        The indexes built so far are copied and brought up to date
+        incrementally rather than rebuilt.
+        """
+        workspace = Workspace(store, self.name, self.cache)
+        with self.lock:
+            built = {name: self.__dict__[name] for name in INDEXES if name in self.__dict__}
+        for name, index in built.items():
+            # Home teamspaces are recomputed (lazily) from the updated rollup
+            if name == "member_home":
+                continue
+            index = copy.deepcopy(index)
+            if name == "trends":
+                index.member_home = workspace.member_home
+            index.update(store)
+            workspace.__dict__[name] = index
+        return workspace
+
+    def aggregate(self, metric, *args):
+        """METRICS[metric](self, *args), cached for every session of the process."""
+        return self.cache.get((self.key, metric, *args), lambda: METRICS[metric](self, *args))
+
+
+# -------------------------------
+# Aggregates, one per dashboard block. Each takes the workspace and its
+# arguments and returns plain values (names resolved, None where there is
+# nothing to show), ready to render or serialize.
+# -------------------------------
+def member_cards(workspace, start, end):
+    """Total members with their change, and the Active Members/Contributors/Creators cards."""
+    store = workspace.store
+    _, _, (members_change,) = workspace.trends.change("members", start, end, to_date=True)
+    cards = {}
+    for activity, types in MEMBER_ACTIVITY.items():
+        # Members are listed by their number of sessions, the others by event count
+        counts = workspace.sessions.per_member(start, end) if activity == "members" else None
+        _, rows = top_actors(store, types, start, end, rollup=workspace.rollup, counts=counts)
+        (active,) = workspace.distinct_counts.count(activity, start, end)
+        cards[activity] = {"active": int(active), "top": [(name, int(count), teamspace) for name, count, teamspace in rows]}
+    return {"total_members": len(store.members), "members_change": _optional(members_change), "cards": cards}
+
+
+def activity_series(workspace, start, end):
+    """Distinct active members per day of the window, for each activity."""
+    days = (end - start) // DAY
+    return {
+        activity: active_series(workspace.store, types, start, end, buckets=days, rollup=workspace.rollup).tolist()
+        for activity, types in MEMBER_ACTIVITY.items()
+    }
+
+
+def content_engagement(workspace, start, end, n=12):
+    """Page and session totals, and the most viewed pages with their readers and reading depth."""
+    store = workspace.store
+    total_pages, active_pages = page_activity(store, start, end)
+    # Active sessions are the engaged ones: more than one page view
+    sessions, engaged_sessions = workspace.sessions.count(start, end)
+
+    heavy_hitters = workspace.heavy_hitters
+    (pages,), _, _ = heavy_hitters.top("pages", start, end, n=n)
+    pages = pages[pages >= 0]
+    top_members, _, _ = heavy_hitters.top("page_members", start, end, keys=pages)
+    top_contributors, _, _ = heavy_hitters.top("page_contributors", start, end, keys=pages)
+    # Mean plus median/p90 from mergeable histograms: reading is bimodal, so the mean alone misleads
+    scroll_mean, scroll = workspace.page_histograms.summary("scroll", start, end, pages)
+    dwell_mean, dwell = workspace.page_histograms.summary("value", start, end, pages)
+    return {
+        "total_pages": int(total_pages),
+        "active_pages": int(active_pages),
+        "sessions": int(sessions),
+        "engaged_sessions": int(engaged_sessions),
+        "pages": [
+            {
+                "page": store.pages[page],
+                "top_member": _name(store.members, top_members[i, 0]),
+                "top_contributor": _name(store.members, top_contributors[i, 0]),
+                "scroll_mean": _optional(scroll_mean[i]),
+                "scroll_median": _optional(scroll[0.5][i]),
+                "scroll_p90": _optional(scroll[0.9][i]),
+                "dwell_mean": _optional(dwell_mean[i]),
+                "dwell_median": _optional(dwell[0.5][i]),
+                "dwell_p90": _optional(dwell[0.9][i]),
+            }
+            for i, page in enumerate(pages)
+        ],
+    }
+
+
+def team_interactions(workspace, start, end, n=10):
+    """Collaboration events with their change and mix of types, and the pages with most collaboration."""
+    store = workspace.store
+    (interactions,), _, (change,) = workspace.trends.change("collaboration", start, end)
+    mix, _, _ = workspace.trends.change("collaboration_types", start, end, keys=COLLABORATION)
+    heavy_hitters = workspace.heavy_hitters
+    (pages,), (counts,), _ = heavy_hitters.top("collaboration_pages", start, end, n=n)
+    found = pages >= 0
+    pages, counts = pages[found], counts[found]
+    collaborators = workspace.distinct_counts.count("page_collaborators", start, end, keys=pages)
+    top_collaborators, _, _ = heavy_hitters.top("page_collaborators", start, end, keys=pages)
+    _, _, page_changes = workspace.trends.change("page_collaboration", start, end, keys=pages)
+    return {
+        "interactions": int(interactions),
+        "change": _optional(change),
+        "mix": _mix(COLLABORATION, mix),
+        "pages": [
+            {
+                "page": store.pages[page],
+                "collaborators": int(collaborators[i]),
+                "interactions": int(counts[i]),
+                "change": _optional(page_changes[i]),
+                "top_collaborator": _name(store.members, top_collaborators[i, 0]),
+            }
+            for i, page in enumerate(pages)
+        ],
+    }
+
+
+def cross_team(workspace, start, end, n=5):
+    """Cross-team interactions with their change and mix of types, and the busiest teamspace pairs."""
+    interactions = TeamspaceInteractions(workspace.store, start, end, workspace.member_home)
+    _, _, (change,) = workspace.trends.change("cross_team", start, end)
+    return {
+        "interactions": int(interactions.total),
+        "change": _optional(change),
+        "mix": _mix(COLLABORATION, interactions.per_type(COLLABORATION)),
+        "pairs": [
+            {
+                "teamspace": teamspace,
+                "shared_page": shared_page,
+                "shared_with": shared_with,
+                "top_collaborator": collaborator,
+                "interactions": int(count),
+            }
+            for teamspace, shared_page, shared_with, collaborator, count in interactions.top(n)
+        ],
+    }
+
+
+def cross_product(workspace, start, end, n=5):
+    """Integration events with their change and mix, and the teamspaces using integrations most."""
+    store = workspace.store
+    (integrations,), _, (change,) = workspace.trends.change("integrations", start, end)
+    mix, _, _ = workspace.trends.change("integration_types", start, end, keys=range(len(store.integrations)))
+    teamspaces, counts = top_teamspaces(store, (EventType.INTEGRATION,), start, end, k=n, rollup=workspace.rollup)
+    top_integrations, _, _ = workspace.heavy_hitters.top("teamspace_integrations", start, end, keys=teamspaces)
+    return {
+        "integrations": int(integrations),
+        "change": _optional(change),
+        "mix": {store.integrations[code]: int(count) for code, count in enumerate(mix)},
+        "teamspaces": [
+            {
+                "teamspace": store.teamspaces[teamspace],
+                "integrations": int(counts[i]),
+                "top_integration": _name(store.integrations, top_integrations[i, 0]),
+            }
+            for i, teamspace in enumerate(teamspaces)
+        ],
+    }
+
+
+def searches(workspace, start, end, n=5):
+    """Search totals and outcome rates, per teamspace and for the top queries."""
+    store = workspace.store
+    search_clicks = workspace.search_clicks
+    total, click_through, zero_results, abandoned = search_clicks.total(start, end)
+    _, _, (change,) = workspace.trends.change("searches", start, end)
+
+    heavy_hitters = workspace.heavy_hitters
+    teamspaces, counts = top_teamspaces(store, (EventType.SEARCH,), start, end, rollup=workspace.rollup)
+    top_pages, _, _ = heavy_hitters.top("teamspace_clicked_pages", start, end, keys=teamspaces)
+    top_queries, _, _ = heavy_hitters.top("teamspace_queries", start, end, keys=teamspaces)
+    _, teamspace_ctr, _, _ = search_clicks.rates("teamspaces", start, end, teamspaces)
+    _, _, teamspace_changes = workspace.trends.change("teamspace_searches", start, end, keys=teamspaces)
+
+    (queries,), (query_counts,), _ = heavy_hitters.top("queries", start, end, n=n)
+    queries, query_counts = queries[queries >= 0], query_counts[queries >= 0]
+    _, query_ctr, query_zero, query_abandoned = search_clicks.rates("queries", start, end, queries)
+    return {
+        "searches": total,
+        "change": _optional(change),
+        "click_through": _optional(click_through),
+        "zero_results": _optional(zero_results),
+        "abandoned": _optional(abandoned),
+        "teamspaces": [
+            {
+                "teamspace": store.teamspaces[teamspace],
+                "searches": int(counts[i]),
+                "change": _optional(teamspace_changes[i]),
+                "click_through": _optional(teamspace_ctr[i]),
+                "top_page": _name(store.pages, top_pages[i, 0]),
+                "top_query": _name(store.queries, top_queries[i, 0]),
+            }
+            for i, teamspace in enumerate(teamspaces)
+        ],
+        "queries": [
+            {
+                "query": store.queries[query],
+                "searches": int(query_counts[i]),
+                "click_through": _optional(query_ctr[i]),
+                "zero_results": _optional(query_zero[i]),
+                "abandoned": _optional(query_abandoned[i]),
+            }
+            for i, query in enumerate(queries)
+        ],
+    }
+
+
+def stale_content(workspace, teamspace=None, n=5):
+    """The n stalest pages (in a teamspace) with their days since the last view."""
+    store = workspace.store
+    pages, last_view = workspace.last_viewed.stalest(n, teamspace=teamspace)
+    return {
+        "pages": [
+            {"page": store.pages[page], "days_since_viewed": int((store.end_time - last) // DAY)}
+            for page, last in zip(pages, last_view)
+        ],
+        "never_viewed": workspace.last_viewed.never_viewed(teamspace),
+    }
+
+
+# Metric name -> aggregate function (see Workspace.aggregate)
+METRICS = {
+    "member_cards": member_cards,
+    "activity_series": activity_series,
+    "content_engagement": content_engagement,
+    "team_interactions": team_interactions,
+    "cross_team": cross_team,
+    "cross_product": cross_product,
+    "searches": searches,
+    "stale_content": stale_content,
+}
+
+
+def _mix(types, counts):
+    # Interaction name -> events of that type
+    return {INTERACTION_NAMES[event_type]: int(count) for event_type, count in zip(types, counts)}
+
+
+def _name(names, code):
+    return names[code] if code >= 0 else None
+
+
+def _optional(value):
+    # NaN (nothing to divide by) becomes None
+    value = float(value)
+    return None if value != value else value
@@ -0,0 +1,141 @@
+"""Read-only JSON API over the dashboard's aggregates, without Streamlit.
+
+Usage: python api.py   (then GET /api/metrics, /api/metrics/<metric>, /api/snapshot)
+
+Serves the same precomputed snapshots as the dashboard (see snapshots.py)
+from NOTION_ANALYTICS_EVENTS, or the demo workspace without it, on
+NOTION_ANALYTICS_API_PORT (8502). Windowed metrics take ?days=7|30|90|365
+(default 90) or ?start=YYYY-MM-DD&end=YYYY-MM-DD (both inclusive);
+stale_content takes ?teamspace=<name>. Responses are gzipped (from 1 KB) and carry an
+ETag derived from the snapshot, so an unchanged figure costs a 304.
+"""
+import datetime
+import hashlib
+import os
+
+import tornado.ioloop
+import tornado.web
+
+from aggregates import METRICS
+from event_store import DAY
+from snapshots import PRESET_DAYS, events_scheduler, preset_window
+
+DEFAULT_DAYS = 90
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    """GET /api/metrics: the metrics served and the preset windows."""
+
+    def initialize(self, scheduler):
+        self.scheduler = scheduler
+
+    def get(self):
+        store = self.scheduler.current.store
+        self.write({
+            "metrics": list(METRICS),
+            "days": list(PRESET_DAYS),
+            "first_day": _date(store.start_time // DAY),
+            "last_day": _date(store.end_time // DAY),
+            "teamspaces": list(store.teamspaces),
+        })
+
+
+class MetricHandler(tornado.web.RequestHandler):
+    """GET /api/metrics/<metric>: one metric of the current snapshot."""
+
+    def initialize(self, scheduler):
+        self.scheduler = scheduler
+        self.etag = None
+
+    async def get(self, metric):
+        if metric not in METRICS:
+            raise tornado.web.HTTPError(404, f"unknown metric {metric!r}")
+        # One snapshot for the whole request, even if a newer one is swapped in meanwhile
+        snapshot = self.scheduler.current
+        args = self.stale_args(snapshot.store) if metric == "stale_content" else self.window_args(snapshot.store)
+
+        # The figures only change with the snapshot, so the ETag needs no computing
+        self.etag = '"%s"' % hashlib.sha1(repr((snapshot.workspace.key, metric, args)).encode()).hexdigest()
+        self.set_etag_header()
+        self.set_header("Cache-Control", "no-cache")
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        value = snapshot.aggregates.get((metric, *args))
+        if value is None:
+            # Not precomputed (a custom range): compute off the event loop
+            loop = tornado.ioloop.IOLoop.current()
+            value = await loop.run_in_executor(None, snapshot.aggregate, metric, *args)
+        self.write(value)
+
+    def compute_etag(self):
+        return self.etag
+
+    def window_args(self, store):
+        start, end = self.get_argument("start", None), self.get_argument("end", None)
+        if start is None and end is None:
+            days = self.get_argument("days", str(DEFAULT_DAYS))
+            if not days.isdigit() or int(days) < 1:
+                raise tornado.web.HTTPError(400, "days must be a positive number of days")
+            return preset_window(store, int(days))
+        try:
+            start_day, end_day = (_day(self.get_argument(name)) for name in ("start", "end"))
+        except (tornado.web.MissingArgumentError, ValueError):
+            raise tornado.web.HTTPError(400, "start and end must both be YYYY-MM-DD dates")
+        if start_day > end_day:
+            raise tornado.web.HTTPError(400, "start must not be after end")
+        return start_day * DAY, (end_day + 1) * DAY
+
+    def stale_args(self, store):
+        teamspace = self.get_argument("teamspace", None)
+        if teamspace is None:
+            return (None,)
+        if teamspace not in store.teamspaces:
+            raise tornado.web.HTTPError(400, f"unknown teamspace {teamspace!r}")
+        return (store.teamspaces.index(teamspace),)
+
+
+class SnapshotHandler(tornado.web.RequestHandler):
+    """GET /api/snapshot: age and build time of the snapshot being served."""
+
+    def initialize(self, scheduler):
+        self.scheduler = scheduler
+
+    def get(self):
+        self.set_header("Cache-Control", "no-store")
+        self.write({**self.scheduler.stats(), "last_error": self.scheduler.last_error})
+
+
+def make_app(scheduler):
+    """The API's Tornado application, serving scheduler's current snapshot."""
+    handlers = [
+        (r"/api/metrics", MetricsHandler),
+        (r"/api/metrics/(\w+)", MetricHandler),
+        (r"/api/snapshot", SnapshotHandler),
+    ]
+    return tornado.web.Application(
+        [(pattern, handler, {"scheduler": scheduler}) for pattern, handler in handlers],
+        compress_response=True,
+    )
+
+
+def _day(text):
+    return (datetime.date.fromisoformat(text) - datetime.date(1970, 1, 1)).days
+
+
+def _date(day):
+    return (datetime.date(1970, 1, 1) + datetime.timedelta(days=day)).isoformat()
+
+
+def main():
+    path = os.environ.get("NOTION_ANALYTICS_EVENTS")
+    interval = float(os.environ.get("NOTION_ANALYTICS_REFRESH_SECONDS", 60))
+    scheduler = events_scheduler(path, interval)
+    port = int(os.environ.get("NOTION_ANALYTICS_API_PORT", 8502))
+    make_app(scheduler.start()).listen(port)
+    print(f"serving on http://localhost:{port}/api/metrics")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import base64
+import functools
+import io
+import os
+import re
+import zlib
+from html import unescape
+
+from PIL import Image
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+AVATAR_FILES = [f"image{i}.png" for i in range(1, 6)]
+
+# Avatars are drawn at 20px; 2x keeps them sharp on high-DPI screens
+AVATAR_PIXELS = 40
+
+# An empty person-icon div, plus the name label that follows it (if any)
+PERSON_ICON_RE = re.compile(
+    r'<div\s+class="person-icon"\s*></div>(\s*<span class="icon-text">([^<]*)</span>)?'
+)
+
+
+@functools.lru_cache(maxsize=None)
+def avatar_data():
+    """Base64-encoded PNG thumbnails of every avatar, read and encoded once per process."""
+    images_data = []
+    for name in AVATAR_FILES:
+        with Image.open(os.path.join(ASSET_DIR, name)) as image:
+            image.thumbnail((AVATAR_PIXELS, AVATAR_PIXELS))
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", optimize=True)
+        images_data.append(base64.b64encode(buffer.getvalue()).decode())
+    return tuple(images_data)
+
+
+def avatar_class(index):
+    """CSS class that paints avatar number index."""
+    return f"avatar-{index}"
+
+
+@functools.lru_cache(maxsize=None)
+def avatar_css():
+    """One <style> block defining an .avatar-N class per avatar.
+
+    Emitted once per page, so each icon only carries a class name instead of
+    its own copy of the image data.
+    """
+    rules = [
+        f".person-icon.{avatar_class(i)} {{ background: url('data:image/png;base64,{b64}') "
+        f"no-repeat center center; background-size: contain; }}"
+        for i, b64 in enumerate(avatar_data())
+    ]
+    return "<style>\n" + "\n".join(rules) + "\n</style>"
+
+
+def avatar_for(name):
+    """Stable avatar index for a person/integration name (same name, same avatar, in every process)."""
+    return zlib.crc32(name.strip().encode()) % len(avatar_data())
+
+
+@functools.lru_cache(maxsize=1024)
+def tag_person_icons(html):
+    """Add each person-icon's avatar class, chosen from the name label next to it.
+
+    The output depends only on html, so identical markdown renders to
+    identical bytes and repeated calls are a cache lookup.
+    """
+    def replacer(match):
+        label, name = match.group(1) or "", match.group(2) or ""
+        # Labels are HTML-escaped; the avatar follows the name itself
+        return f'<div class="person-icon {avatar_class(avatar_for(unescape(name)))}"></div>{label}'
+
+    return PERSON_ICON_RE.sub(replacer, html)
@@ -0,0 +1,172 @@
+"""Benchmark full dashboard reruns against synthetic workspaces of increasing size.
+
+For each size a seeded synthetic workspace is written to an event log (and
+reused on later runs), then the dashboard runs headlessly in a fresh
+process pointed at it. Each tab reports its cold (first) run, warm-rerun
+p50/p99 and the median time of every block inside it; each size also
+reports the cold start of the whole app and the peak RSS of that process.
+
+Usage: python benchmarks/dashboard.py [--sizes N ...] [--reruns R] [--output results.json]
+
+Compare two commits by diffing their output files.
+"""
+import argparse
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = [100_000, 1_000_000, 10_000_000]
+TABS = ["Engagement", "Collaboration", "Discovery"]
+
+
+def workspace_shape(n_events):
+    """Members/pages/teamspaces that grow with the event count, like a real workspace."""
+    return {
+        "members": max(100, n_events // 2_000),
+        "pages": max(500, n_events // 100),
+        "teamspaces": min(200, 10 + n_events // 100_000),
+    }
+
+
+def ensure_workspace(directory, n_events, seed=0):
+    """Generate the event log for n_events into directory unless it is already there.
+
+    Returns the generation time in seconds (0.0 when reused).
+    """
+    from synthetic import SyntheticWorkspace
+
+    path = os.path.join(directory, f"events-{n_events}-seed{seed}")
+    if os.path.isdir(path) and os.listdir(path):
+        return path, 0.0
+    start = time.perf_counter()
+    SyntheticWorkspace(seed=seed, **workspace_shape(n_events)).write_log(path, n_events, compact=True)
+    return path, time.perf_counter() - start
+
+
+def run_dashboard(reruns):
+    """Run the dashboard headlessly in this process and time every tab.
+
+    Expects NOTION_ANALYTICS_EVENTS to point at the workspace.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    script = os.path.join(ROOT, "NotionAnalytics.py")
+    # The dashboard loads its assets relative to the working directory
+    os.chdir(ROOT)
+    at = AppTest.from_file(script, default_timeout=600)
+
+    def timed_run(tab):
+        # AppTest doesn't carry the open tab over between runs; select it every time
+        at.session_state["active_tab"] = tab
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        times = dict(at.session_state["run_profile"].times)
+        if tab not in times:
+            raise RuntimeError(f"the run didn't render the {tab} tab (sections: {', '.join(times)})")
+        return elapsed, times
+
+    cold_start, cold_start_sections = timed_run(TABS[0])
+    tabs = {}
+    for tab in TABS:
+        cold, cold_sections = timed_run(tab)
+        warm = [timed_run(tab) for _ in range(reruns)]
+        times = np.array([elapsed for elapsed, _ in warm])
+        sections = {
+            name: float(np.median([profile.get(name, 0.0) for _, profile in warm]))
+            for name in cold_sections
+        }
+        tabs[tab] = {
+            "cold_s": cold,
+            "warm_p50_s": float(np.percentile(times, 50)),
+            "warm_p99_s": float(np.percentile(times, 99)),
+            "cold_sections_s": cold_sections,
+            "warm_sections_p50_s": sections,
+        }
+
+    return {
+        "cold_start_s": cold_start,
+        "cold_start_sections_s": cold_start_sections,
+        # ru_maxrss is in KiB on Linux (bytes on macOS)
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+        "tabs": tabs,
+    }
+
+
+def benchmark_size(directory, n_events, reruns, seed=0):
+    """Generate (or reuse) one workspace and benchmark the dashboard on it in a fresh process."""
+    path, generate_s = ensure_workspace(directory, n_events, seed)
+    env = dict(os.environ, NOTION_ANALYTICS_EVENTS=path)
+    # A fresh interpreter so caches, imports and peak RSS start from zero for each size
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run", "--reruns", str(reruns)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return {"events": n_events, **workspace_shape(n_events), "seed": seed, "generate_s": generate_s, **result}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="event counts to benchmark")
+    parser.add_argument("--reruns", type=int, default=20, help="warm reruns per tab")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workspaces", default=os.path.join(tempfile.gettempdir(), "notion-analytics-bench"),
+                        help="directory where generated workspaces are kept and reused")
+    parser.add_argument("--output", default="dashboard-benchmark.json", help="machine-readable results file")
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: benchmark the workspace in NOTION_ANALYTICS_EVENTS, print JSON
+        print(json.dumps(run_dashboard(args.reruns)))
+        return
+
+    import streamlit
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "streamlit": streamlit.__version__,
+        "reruns": args.reruns,
+        "results": [],
+    }
+    for n_events in args.sizes:
+        result = benchmark_size(args.workspaces, n_events, args.reruns, args.seed)
+        report["results"].append(result)
+        tabs = result["tabs"]
+        print(
+            f"{n_events:>12,} events  cold start {result['cold_start_s']:.2f}s  "
+            f"peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB  "
+            + "  ".join(f"{tab} p50 {t['warm_p50_s'] * 1000:.0f}ms p99 {t['warm_p99_s'] * 1000:.0f}ms" for tab, t in tabs.items())
+        )
+        # Written after every size so a long run still leaves partial results
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
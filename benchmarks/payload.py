@@ -0,0 +1,33 @@
+"""Measure the HTML payload one dashboard render sends to the browser.
+
+Usage: python benchmarks/payload.py [path/to/NotionAnalytics.py]
+"""
+import os
+import sys
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def markdown_payload(script):
+    """Run script headlessly once and return the byte size of every st.markdown body."""
+    # The dashboard loads its assets relative to the working directory
+    os.chdir(os.path.dirname(os.path.abspath(script)))
+    at = AppTest.from_file(os.path.abspath(script), default_timeout=120)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return [len(element.value.encode()) for element in at.markdown]
+
+
+def main():
+    script = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "NotionAnalytics.py")
+    sizes = markdown_payload(script)
+    print(f"markdown elements: {len(sizes)}")
+    print(f"total bytes:       {sum(sizes)}")
+    print(f"largest element:   {max(sizes)}")
+
+
+if __name__ == "__main__":
+    main()
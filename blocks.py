@@ -0,0 +1,406 @@
+"""HTML of the dashboard's blocks, from the aggregates (see aggregates.METRICS).
+
+Shared by the Streamlit app and the static export, so both show the same
+markup. Person icons are left untagged: the caller runs the HTML through
+assets.tag_person_icons. Names come from workspace data, so they are
+HTML-escaped wherever they go into markup.
+"""
+from html import escape
+
+# Page styling - Dark Mode with updated colors, icon alignment, and using 'Inter'
+DASHBOARD_CSS = """
+<style>
+    /* Global styling */
+    .stApp {
+        font-family: sans-serif;
+        background-color: #121212;
+        color: #e0e0e0;
+    }
+    /* Remove the sidebar completely */
+    [data-testid="stSidebar"] { dispalay: none; }
+
+    /* Main content area styling */
+    .main .block-container {
+        padding-top: 1rem;
+        padding-bottom: 1rem;
+    }
+
+    /* Card styling for sections */
+    .member-card {
+        background-color: #262626;
+        border-radius: 4px;
+        padding: 10px;
+        margin-bottom: 20px;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.3);
+        color: #D4D4D4;
+    }
+
+    /* Dropdown styling for the time-range selectors */
+    [data-testid="stSelectbox"] div[data-baseweb="select"] > div {
+        border: 1px solid #444444;
+        border-radius: 4px;
+        font-size: 0.9rem;
+        background-color: #1B2028;
+        color: #2483E2;
+    }
+
+    /* Icon placeholders */
+    .person-icon {
+        width: 20px;
+        height: 20px;
+        background-color: #555555;
+        border-radius: 50%;
+        margin-right: 10px;
+        display: inline-block;
+        vertical-align: middle;
+    }
+    .page-icon {
+        width: 20px;
+        height: 20px;
+        background-color: #555555;
+        border-radius: 5px;
+        margin-right: 10px;
+        display: inline-block;
+        vertical-align: middle;
+    }
+
+    /* Align text with icons */
+    .icon-text {
+        display: inline-block;
+        vertical-align: middle;
+    }
+
+    /* Responsive layout adjustments */
+    @media (max-width: 1200px) {
+        .stApp .block-container {
+            padding: 1rem;
+        }
+    }
+    @media (max-width: 992px) {
+        .main .block-container {
+            padding-top: 0.5rem;
+            padding-bottom: 0.5rem;
+        }
+    }
+</style>
+"""
+
+# Slice colors of the Collaboration tab's mix donuts, in mix order
+# Team-Specific: darker-to-lighter pastel blues
+TEAM_MIX_COLORS = ["#7DA7C7", "#8FBED6", "#9FD3E6", "#AADFF0", "#B3E5F2", "#BCE9F4", "#C6EDF6", "#D0F2F9"]
+# Cross-Team: darker-to-lighter pastel greens
+CROSS_TEAM_MIX_COLORS = ["#A8E6CF", "#B2F2D2", "#BBF8D7", "#C4FFD9", "#CCFFDF", "#D5FFE3", "#DEFFE7", "#E7FFEB"]
+# Cross-Product: pastel yellows, one per integration
+CROSS_PRODUCT_MIX_COLORS = ["#FFF9C4", "#FFF59D", "#FFF176", "#FFEE58", "#FFEB3B", "#FDD835", "#FBC02D", "#F9A825"]
+
+
+def percent(rate):
+    """Format a fraction as a whole percentage ("—" when there is nothing to divide)."""
+    return "—" if rate is None else f"{rate:.0%}"
+
+
+def trend_html(change, period):
+    """Card line comparing a window with an earlier one, e.g. "↗ 12% more than previous 90 days"."""
+    if change is None:
+        return f'<p style="font-size: 0.9rem; color: #888888; margin-top: 1px;">&gt; nothing to compare with {period}</p>'
+    if change >= 0:
+        return f'<p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">&gt;↗ {change:.0%} more than {period}</p>'
+    return f'<p style="font-size: 0.9rem; color: red; margin-top: 1px;">&gt;↘ {-change:.0%} less than {period}</p>'
+
+
+def trend_cell(change):
+    """Table trend as (text, color): "+5%" in green, "-3%" in red."""
+    if change is None:
+        return "—", "#888888"
+    return f"{change:+.0%}", "#4caf50" if change >= 0 else "red"
+
+
+# -------------------------------
+# Engagement
+# -------------------------------
+def total_members_html(member_cards, days):
+    """Total Members card: members who had joined by the window's end vs by its start."""
+    return f"""
+<div class="member-card" style="width: 100%;">
+    <h2 style="margin: 0;">Total Members <span style="float: right;">{member_cards["total_members"]}</span></h2>
+    {trend_html(member_cards["members_change"], f"{days} days ago")}
+</div>
+"""
+
+
+def member_card_html(title, count, column_label, rows):
+    """Render an activity card: header count plus a Name / column_label / Top Teamspace table."""
+    html = f"""
+        <div class="member-card">
+            <h4 style="margin-bottom: 10px;">{title} <span style="float: right;">{count}</span></h4>
+            <div style="display: flex; align-items: center; font-weight: bold; margin-bottom: 10px;">
+                <div style="flex: 1; text-align: left;">Name</div>
+                <div style="flex: 1; text-align: left;">{column_label}</div>
+                <div style="flex: 1; text-align: left;">Top Teamspace</div>
+            </div>
+"""
+    for i, (name, value, teamspace) in enumerate(rows):
+        # Last row has no bottom margin
+        margin = " margin-bottom: 5px;" if i < len(rows) - 1 else ""
+        html += f"""            <div style="display: flex; align-items: center;{margin}">
+                <div style="flex: 1; text-align: left;"><div class="person-icon"></div><span class="icon-text">{escape(name)}</span></div>
+                <div style="flex: 1; text-align: left;">{value}</div>
+                <div style="flex: 1; text-align: left;"><div class="page-icon"></div><span class="icon-text">{escape(teamspace)}</span></div>
+            </div>
+"""
+    html += "        </div>\n        "
+    return html
+
+
+def content_cards_html(engagement):
+    """Total Pages and Total Sessions cards; active sessions are the engaged ones (more than one page view)."""
+    pages = f"""
+        <div class="member-card" style="width: 100%;">
+            <h2 style="margin: 0;">Total Pages <span style="float: right;">{engagement["total_pages"]}</span></h2>
+            <p style="font-size: 0.9rem; color: #4caf50; margin-top: 1px;">> Active Pages: {engagement["active_pages"]}</p>
+        </div>
+        """
+    sessions = f"""
+        <div class="member-card" style="width: 100%;">
+            <h2 style="margin: 0;">Total Sessions <span style="float: right;">{engagement["sessions"]}</span></h2>
+            <p style="font-size: 0.9rem;color: #4caf50; margin-top: 1px;">> Active Sessions: {engagement["engaged_sessions"]}</p>
+        </div>
+        """
+    return pages, sessions
+
+
+def engagement_table_html(engagement):
+    """The most viewed pages, with each page's most frequent viewer and editor and its scroll depth / dwell time spread."""
+    table_html = """
+<table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
+  <tr style="text-align: left; border-bottom: 1px solid #444444;">
+    <th style="padding: 8px;">Page Name</th>
+    <th style="padding: 8px;">Top Member</th>
+    <th style="padding: 8px;">Top Contributor</th>
+    <th style="padding: 8px;">Avg Scroll Depth</th>
+    <th style="padding: 8px;">Avg Time Spent (min)</th>
+  </tr>
+    """
+    for row in engagement["pages"]:
+        scroll_depth = round(row["scroll_mean"] or 0)
+        scroll_spread = f"median {row['scroll_median'] or 0:.0f}% · p90 {row['scroll_p90'] or 0:.0f}%"
+        avg_time = f"{(row['dwell_mean'] or 0) / 60:.1f}"
+        time_spread = f"median {(row['dwell_median'] or 0) / 60:.1f} · p90 {(row['dwell_p90'] or 0) / 60:.1f}"
+        page = escape(row["page"])
+        member = escape(row["top_member"] or "—")
+        contributor = escape(row["top_contributor"] or "—")
+        progress_html = f"""
+    <div style="width: 100%; background-color: #555555; height: 10px; border-radius: 5px; margin-bottom: 2px;">
+        <div style="width: {scroll_depth}%; background-color: #4caf50; height: 10px; border-radius: 5px;"></div>
+    </div>
+    <span style="font-size: 0.8rem;">{scroll_depth}%</span>
+    <span style="font-size: 0.7rem; color: #aaaaaa;">{scroll_spread}</span>
+    """
+        table_html += f"""
+  <tr style="border-bottom: 1px solid #444444;">
+    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{page}</span></td>
+    <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">{member}</span></td>
+    <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">{contributor}</span></td>
+    <td style="padding: 8px;">{progress_html}</td>
+    <td style="padding: 8px;">{avg_time} min<br><span style="font-size: 0.7rem; color: #aaaaaa;">{time_spread}</span></td>
+  </tr>
+  """
+    table_html += "</table>"
+    return table_html
+
+
+# -------------------------------
+# Collaboration
+# -------------------------------
+def interactions_card_html(title, count, change, period):
+    """Active Team / Cross Team / Cross Product card, sized to sit next to its donut."""
+    return f"""
+<div class="member-card" style="width: 100%; min-height: 240px;">
+    <h2 style="margin: 0;">{title} <span style="float: right;">{count}</span></h2>
+    {trend_html(change, period)}
+</div>
+"""
+
+
+def team_table_html(team):
+    """The pages with most collaboration, their distinct collaborators and top collaborator."""
+    table_html = """
+<table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
+  <tr style="text-align: left; border-bottom: 1px solid #444444;">
+    <th style="padding: 8px;">Current Team Page</th>
+    <th style="padding: 8px;"># Unique Collaborators</th>
+    <th style="padding: 8px;">Total Interactions</th>
+    <th style="padding: 8px;">Interactions Trend</th>
+    <th style="padding: 8px;">Top Collaborator</th>
+  </tr>"""
+    for i, row in enumerate(team["pages"]):
+        border = ' style="border-bottom: 1px solid #444444;"' if i < len(team["pages"]) - 1 else ""
+        trend, color = trend_cell(row["change"])
+        table_html += f"""
+  <tr{border}>
+    <td style="padding: 8px;">
+        <div class="page-icon"></div><span class="icon-text">{escape(row["page"])}</span>
+    </td>
+    <td style="padding: 8px;">{row["collaborators"]}</td>
+    <td style="padding: 8px;">{row["interactions"]}</td>
+    <td style="padding: 8px;"><span style="color: {color};">{trend}</span></td>
+    <td style="padding: 8px;">
+        <div class="person-icon"></div><span class="icon-text">{escape(row["top_collaborator"] or "—")}</span>
+    </td>
+  </tr>"""
+    table_html += """
+</table>
+"""
+    return table_html
+
+
+def cross_team_table_html(cross_team):
+    """The busiest teamspace pairs; the last row has no bottom border."""
+    table_html = """
+    <table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
+    <tr style="text-align: left; border-bottom: 1px solid #444444;">
+        <th style="padding: 8px;">Teamspace</th>
+        <th style="padding: 8px;">Shared Content</th>
+        <th style="padding: 8px;">Shared with</th>
+        <th style="padding: 8px;">Top Collaborator</th>
+        <th style="padding: 8px;">Interactions</th>
+    </tr>
+    """
+    rows = cross_team["pairs"]
+    for i, row in enumerate(rows):
+        border = ' style="border-bottom: 1px solid #444444;"' if i < len(rows) - 1 else ""
+        table_html += f"""
+    <tr{border}>
+        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{escape(row["teamspace"])}</span></td>
+        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{escape(row["shared_page"])}</span></td>
+        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{escape(row["shared_with"])}</span></td>
+        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">{escape(row["top_collaborator"])}</span></td>
+        <td style="padding: 8px;">{row["interactions"]}</td>
+    </tr>
+    """
+    table_html += """
+    </table>
+    """
+    return table_html
+
+
+def cross_product_table_html(cross_product):
+    """The teamspaces using integrations most and their top integration; the last row has no bottom border."""
+    table_html = """
+    <table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
+    <tr style="text-align: left; border-bottom: 1px solid #444444;">
+        <th style="padding: 8px;">Teamspace</th>
+        <th style="padding: 8px;">Number of Integrations</th>
+        <th style="padding: 8px;">Top Integration</th>
+    </tr>
+    """
+    rows = cross_product["teamspaces"]
+    for i, row in enumerate(rows):
+        border = ' style="border-bottom: 1px solid #444444;"' if i < len(rows) - 1 else ""
+        table_html += f"""
+    <tr{border}>
+        <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{escape(row["teamspace"])}</span></td>
+        <td style="padding: 8px;">{row["integrations"]}</td>
+        <td style="padding: 8px;"><div class="person-icon"></div><span class="icon-text">{escape(row["top_integration"] or "—")}</span></td>
+    </tr>
+    """
+    table_html += """
+    </table>
+    """
+    return table_html
+
+
+def mix_chart_data(mix, colors):
+    """donut chart data of an aggregate's mix (None when it is all zeros).
+
+    Empty slices are left out; the others keep the color of their place in
+    the mix, so a slice's color doesn't change with the window.
+    """
+    slices = [(label, size, colors[i % len(colors)]) for i, (label, size) in enumerate(mix.items()) if size]
+    if not slices:
+        return None
+    labels, sizes, slice_colors = (list(column) for column in zip(*slices))
+    return {"labels": labels, "sizes": sizes, "colors": slice_colors}
+
+
+# -------------------------------
+# Discovery
+# -------------------------------
+def searches_card_html(searches, days):
+    """Total Searches card with the outcome rates."""
+    return f"""
+<div class="member-card" style="width: 100%; min-height: 180px;">
+    <h2 style="margin: 0;">Total Searches <span style="float: right;">{searches["searches"]}</span></h2>
+    {trend_html(searches["change"], f"previous {days} days")}
+    <p style="font-size: 0.9rem; margin-top: 1px;">Click-through {percent(searches["click_through"])} · Zero results {percent(searches["zero_results"])} · Abandoned {percent(searches["abandoned"])}</p>
+</div>
+"""
+
+
+def teamspace_searches_html(searches):
+    """Searches by Teamspace table."""
+    table_html = """
+<table style="width: 100%; border-collapse: collapse; margin-top: 10px;">
+  <tr style="text-align: left; border-bottom: 1px solid #444444; font-size: 12px;">
+    <th style="padding: 8px;">Teamspace</th>
+    <th style="padding: 8px;"># Searches</th>
+    <th style="padding: 8px;">Search Trend</th>
+    <th style="padding: 8px;">Click-through Rate</th>
+    <th style="padding: 8px;">Top Searched Page</th>
+    <th style="padding: 8px;">Top Searches</th>
+  </tr>"""
+    rows = searches["teamspaces"]
+    for i, row in enumerate(rows):
+        border = " border-bottom: 1px solid #444444;" if i < len(rows) - 1 else ""
+        trend, color = trend_cell(row["change"])
+        table_html += f"""
+  <tr style="{border} font-size: 12px;">
+    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{escape(row["teamspace"])}</span></td>
+    <td style="padding: 8px;">{row["searches"]}</td>
+    <td style="padding: 8px;"><span style="color: {color};">{trend}</span></td>
+    <td style="padding: 8px;">{percent(row["click_through"])}</td>
+    <td style="padding: 8px;"><div class="page-icon"></div><span class="icon-text">{escape(row["top_page"] or "—")}</span></td>
+    <td style="padding: 8px;">{escape(row["top_query"].capitalize()) if row["top_query"] else "—"}</td>
+  </tr>"""
+    table_html += """
+</table>
+"""
+    return table_html
+
+
+def query_searches_html(searches):
+    """Searches by Content table: the top queries and their outcomes."""
+    table_html = """
+<table style="width: 100%; border-collapse: collapse; margin-top: 10px;">
+  <tr style="text-align: left; border-bottom: 1px solid #444444; font-size: 12px;">
+    <th style="padding: 8px;">Top Searches</th>
+    <th style="padding: 8px;"># Searches</th>
+    <th style="padding: 8px;">Click-through Rate</th>
+    <th style="padding: 8px;">Zero Results</th>
+    <th style="padding: 8px;">Abandoned</th>
+  </tr>"""
+    rows = searches["queries"]
+    for i, row in enumerate(rows):
+        border = " border-bottom: 1px solid #444444;" if i < len(rows) - 1 else ""
+        table_html += f"""
+  <tr style="{border} font-size: 12px;">
+    <td style="padding: 8px;">{escape(row["query"].title())}</td>
+    <td style="padding: 8px;">{row["searches"]}</td>
+    <td style="padding: 8px;">{percent(row["click_through"])}</td>
+    <td style="padding: 8px;">{percent(row["zero_results"])}</td>
+    <td style="padding: 8px;">{percent(row["abandoned"])}</td>
+  </tr>"""
+    table_html += """
+</table>
+"""
+    return table_html
+
+
+def stale_chart_data(stale):
+    """barh chart data of the stalest pages (None when no page was ever viewed)."""
+    if not stale["pages"]:
+        return None
+    return {
+        "labels": [row["page"] for row in stale["pages"]],
+        "values": [row["days_since_viewed"] for row in stale["pages"]],
+    }
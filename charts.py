@@ -0,0 +1,496 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+
+# Same savefig settings st.pyplot uses, so cached images look identical
+SAVEFIG_KWARGS = {"format": "png", "bbox_inches": "tight", "dpi": 200}
+
+# Default styling per chart kind; callers override individual keys
+DEFAULT_STYLES = {
+    "area": {
+        "width": 4,
+        "height": 1.5,
+        "facecolor": "#262626",
+        "fill_color": "#e0f0ff",
+        "line_color": "#80bfff",
+        "font_size": 7,
+        "title_fontsize": 9,  # Match h4 size of the cards above
+        "text_color": "#D4D4D4",
+        "y_ticks": 5,
+    },
+    "donut": {
+        "width": 1.5,
+        "height": 1.1,
+        "facecolor": "none",
+        "font_size": 4,
+        "text_color": "#e0e0e0",
+        "hole_color": "#121212",
+        "start_angle": 140,
+    },
+    "barh": {
+        "width": 5.5,
+        "height": 1,
+        "facecolor": "none",
+        "bar_color": "#A8E6CF",  # Pastel green
+        "font_size": 4,
+        "text_color": "#666666",
+        "x_label": "Days Since Last Viewed",
+    },
+}
+
+
+def _draw_area(fig, ax, data, style):
+    # "Active ... over time" chart: filled area under a line, y axis only
+    y = np.asarray(data["y"])
+    x = np.arange(len(y)) if data.get("x") is None else np.asarray(data["x"])
+
+    # Add title to match section header styling
+    fig.text(
+        0.05,  # X position - aligned with left edge of plot
+        0.95,  # Y position - top of the figure
+        data["title"],
+        fontsize=style["title_fontsize"],
+        color=style["text_color"],
+        fontweight="medium",
+        ha="left",
+    )
+
+    # No more points than the plot is pixels wide: more can't be seen, only rendered
+    pixels = int(ax.get_position().width * fig.get_figwidth() * SAVEFIG_KWARGS["dpi"])
+    y_max = max(float(y.max()) if len(y) else 0, 1)
+    x, y = downsample_minmax(x, y, pixels)
+    ax.fill_between(x, y, color=style["fill_color"], alpha=0.5)
+    ax.plot(x, y, color=style["line_color"])
+    ax.set_ylim(0, y_max)
+    ax.set_yticks(np.linspace(0, y_max, style["y_ticks"]))
+    if len(x):
+        ax.set_xticks(np.linspace(x.min(), x.max(), 15))
+    ax.set_xticklabels([])
+    ax.tick_params(axis="y", colors=style["text_color"], labelsize=style["font_size"])
+    ax.tick_params(axis="x", colors=style["facecolor"])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    # Adjust plot margins to make room for the title
+    fig.subplots_adjust(top=0.8)
+
+
+def downsample_minmax(x, y, n_points):
+    """Reduce a series to at most n_points that still show every peak and dip.
+
+    The points are split into equal buckets, two points per bucket: each
+    bucket keeps its lowest and highest point (in x order), plus the
+    series' first and last point. Unlike averaging, no extreme is lost.
+    """
+    n = len(y)
+    if n <= max(n_points, 4):
+        return x, y
+    buckets = max((n_points - 2) // 2, 1)
+    size = -(-n // buckets)
+    # Pad with the last value to whole buckets; padded positions map back to it
+    padded = np.concatenate([y, np.full(buckets * size - n, y[-1])]).reshape(buckets, size)
+    start = np.arange(buckets)[:, None] * size
+    picked = np.sort(np.stack([padded.argmin(axis=1), padded.argmax(axis=1)], axis=1) + start, axis=1)
+    keep = np.unique(np.concatenate([[0], np.minimum(picked.ravel(), n - 1), [n - 1]]))
+    return x[keep], y[keep]
+
+
+def _draw_donut(fig, ax, data, style):
+    # Interactions mix: pie with a hole, labels only (no percentages)
+    ax.pie(
+        data["sizes"],
+        labels=data["labels"],
+        colors=data["colors"],
+        startangle=style["start_angle"],
+        textprops={"fontsize": style["font_size"], "color": style["text_color"]},
+    )
+    # Create the donut hole
+    ax.add_artist(Circle((0, 0), 0.70, fc=style["hole_color"]))
+
+    ax.axis("equal")  # Ensures the pie is drawn as a circle
+
+
+def _draw_barh(fig, ax, data, style):
+    # Stale Content Watch: one horizontal bar per page, largest on top
+    labels = data["labels"]
+    y_pos = np.arange(len(labels))
+    ax.barh(y_pos, data["values"], height=0.3, color=style["bar_color"])
+
+    ax.set_yticks(y_pos)
+    # Left-align the labels; add more padding to avoid overlap
+    ax.set_yticklabels(labels, fontsize=style["font_size"], color=style["text_color"], ha="left")
+    ax.tick_params(axis="y", which="both", length=0, pad=60)  # Increase pad to move labels left
+
+    ax.invert_yaxis()  # highest value on top
+    ax.set_xlabel(style["x_label"], fontsize=style["font_size"], color=style["text_color"])
+
+    # Remove tick marks from x-axis while keeping the numbers
+    ax.tick_params(axis="x", which="both", length=0, labelsize=style["font_size"], colors=style["text_color"])
+
+    # Remove spines (borders)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    # Ensure labels aren't clipped
+    fig.subplots_adjust(left=0.25, right=0.95)
+
+
+DRAWERS = {
+    "area": _draw_area,
+    "donut": _draw_donut,
+    "barh": _draw_barh,
+}
+
+
+class FigurePool:
+    """Reusable dark-theme figures, one free list per chart shape.
+
+    Figures are created with their own Agg canvas instead of through pyplot,
+    so pyplot's global figure manager never holds on to them. figure() always
+    hands the figure back (cleared) when the block exits, even on errors;
+    anything beyond max_per_shape spare figures is dropped for the GC.
+    """
+
+    def __init__(self, max_per_shape=4):
+        self.max_per_shape = max_per_shape
+        self.free = {}
+        self.in_use = 0
+        self.created = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def figure(self, width, height, facecolor):
+        shape = (width, height, facecolor)
+        with self.lock:
+            free = self.free.get(shape)
+            fig = free.pop() if free else None
+            if fig is None:
+                self.created += 1
+            self.in_use += 1
+        if fig is None:
+            fig = Figure(figsize=(width, height))
+            FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        fig.patch.set_facecolor(facecolor)
+        ax.set_facecolor(facecolor)
+        try:
+            yield fig, ax
+        finally:
+            self._release(shape, fig)
+
+    def _release(self, shape, fig):
+        # Drop every artist and margin override so the next user starts clean
+        fig.clear()
+        fig.subplotpars.update(
+            **{name: matplotlib.rcParams[f"figure.subplot.{name}"] for name in ("left", "right", "bottom", "top")}
+        )
+        with self.lock:
+            self.in_use -= 1
+            free = self.free.setdefault(shape, [])
+            if len(free) < self.max_per_shape:
+                free.append(fig)
+
+    def stats(self):
+        """Live-figure count and memory gauges."""
+        with self.lock:
+            pooled = sum(len(free) for free in self.free.values())
+            in_use = self.in_use
+            created = self.created
+        return {
+            "figures_in_use": in_use,
+            "figures_pooled": pooled,
+            "figures_created": created,
+            # Figures registered with pyplot are never released by the pool; this should stay 0
+            "pyplot_figures": len(plt.get_fignums()),
+            "rss_bytes": process_rss(),
+        }
+
+
+def process_rss():
+    """Current resident set size of this process in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+# One pool per process
+FIGURE_POOL = FigurePool()
+
+
+def render_chart(kind, data, style, pool=FIGURE_POOL):
+    """Draw one chart on a pooled figure and return its encoded PNG bytes."""
+    with pool.figure(style["width"], style["height"], style["facecolor"]) as (fig, ax):
+        DRAWERS[kind](fig, ax, data, style)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, **SAVEFIG_KWARGS)
+    return buffer.getvalue()
+
+
+def render_chart_timed(kind, data, style, pool=FIGURE_POOL):
+    """render_chart(), also returning how many seconds the render took and the pool's stats() after it.
+
+    The stats carry the pid of the process that rendered.
+    """
+    start = time.perf_counter()
+    image = render_chart(kind, data, style, pool)
+    return image, time.perf_counter() - start, {"pid": os.getpid(), **pool.stats()}
+
+
+def chart_key(kind, data, style):
+    """Digest of a chart's kind, data arrays and styling; equal inputs give equal keys."""
+    digest = hashlib.sha1(kind.encode())
+    for name in sorted(data):
+        value = data[name]
+        digest.update(name.encode())
+        if isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype.str}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(json.dumps(value, default=_json_default).encode())
+    digest.update(json.dumps(style, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _json_default(value):
+    # NumPy scalars and arrays nested in lists
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"cannot hash {type(value).__name__} chart data")
+
+
+class ChartCache:
+    """Thread-safe LRU cache of encoded chart images, bounded by total bytes."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            image = self.entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = image
+            self.size += len(image)
+            # Evict least recently used images until we fit the budget again
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# One cache per process, shared by every session's reruns
+CHART_CACHE = ChartCache()
+
+
+@contextmanager
+def _hidden_main():
+    # Spawned workers re-run the parent's __main__ module, which under Streamlit
+    # is the dashboard script itself; give them an empty one instead
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def _init_render_worker():
+    # Workers never show windows; pin the non-interactive backend before anything draws
+    matplotlib.use("Agg")
+
+
+class ChartRenderer:
+    """Render chart specs on a pool of worker processes, in parallel.
+
+    pyplot/matplotlib state is not thread-safe, so parallelism comes from
+    processes: every worker has its own matplotlib and FigurePool. submit()
+    returns a Future right away (already done on a cache hit) and identical
+    charts already in flight share one Future. With workers=0, or if the
+    pool dies, charts are rendered in the calling process instead.
+
+    Futures carry cache_hit and render_seconds (time spent in matplotlib,
+    wherever it ran) for profiling. Every render also reports its process's
+    FigurePool stats, the latest of which stats() sums up.
+    """
+
+    def __init__(self, workers=None, cache=None):
+        if workers is None:
+            workers = int(os.environ.get("NOTION_ANALYTICS_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+        self.workers = workers
+        self.cache = CHART_CACHE if cache is None else cache
+        self.executor = None
+        self.pending = {}
+        self.renders = 0
+        self.render_seconds = 0.0
+        # pid -> the FigurePool stats() that process reported with its last render
+        self.pool_stats = {}
+        # Reentrant: in-process renders resolve their future while submit() holds it
+        self.lock = threading.RLock()
+
+    def _executor(self):
+        # Created on first use; spawn, because forking a threaded server is unsafe
+        if self.executor is None and self.workers > 0:
+            with _hidden_main():
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_render_worker,
+                )
+                # Start every worker now, while __main__ is hidden (submit spawns on demand)
+                for _ in range(self.workers):
+                    self.executor.submit(os.getpid)
+        return self.executor
+
+    def submit(self, kind, data, style=None):
+        """Start rendering a chart; returns a Future of its PNG bytes."""
+        style = {**DEFAULT_STYLES[kind], **(style or {})}
+        key = chart_key(kind, data, style)
+        image = self.cache.get(key)
+        if image is not None:
+            future = _chart_future(cache_hit=True)
+            future.set_result(image)
+            return future
+
+        with self.lock:
+            future = self.pending.get(key)
+            if future is not None:
+                return future
+            future = _chart_future(cache_hit=False)
+            executor = self._executor()
+            if executor is None:
+                self._resolve(future, render_chart_timed(kind, data, style))
+            else:
+                try:
+                    rendering = executor.submit(render_chart_timed, kind, data, style)
+                    rendering.add_done_callback(lambda done: self._resolve(future, done))
+                except BrokenProcessPool:
+                    self.executor = None
+                    self.pool_stats.clear()
+                    self.workers = 0
+                    self._resolve(future, render_chart_timed(kind, data, style))
+            self.pending[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _resolve(self, future, rendered):
+        # rendered is (image, seconds, pool stats) or the worker's Future of it
+        if isinstance(rendered, Future):
+            if rendered.exception() is not None:
+                future.set_exception(rendered.exception())
+                return
+            rendered = rendered.result()
+        image, future.render_seconds, pool_stats = rendered
+        with self.lock:
+            self.renders += 1
+            self.render_seconds += future.render_seconds
+            self.pool_stats[pool_stats.pop("pid")] = pool_stats
+        future.set_result(image)
+
+    def _finish(self, key, future):
+        with self.lock:
+            self.pending.pop(key, None)
+            if isinstance(future.exception(), BrokenProcessPool):
+                # A worker died; start a fresh pool on the next submit
+                self.executor = None
+                self.pool_stats.clear()
+        if future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def render_all(self, specs):
+        """Render (kind, data, style) specs concurrently; returns their PNG bytes in order."""
+        futures = [self.submit(*spec) for spec in specs]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        """Render totals, and the figure pools of the processes that rendered, summed.
+
+        worker_rss_bytes leaves out this process (see process_rss()), which
+        renders itself only without workers.
+        """
+        with self.lock:
+            pools = dict(self.pool_stats)
+            renders, render_seconds = self.renders, self.render_seconds
+        return {
+            "workers": self.workers,
+            "renders": renders,
+            "render_seconds": render_seconds,
+            **{
+                name: sum(stats[name] for stats in pools.values())
+                for name in ("figures_in_use", "figures_pooled", "figures_created", "pyplot_figures")
+            },
+            "worker_rss_bytes": sum(stats["rss_bytes"] for pid, stats in pools.items() if pid != os.getpid()),
+        }
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+def _chart_future(cache_hit):
+    future = Future()
+    future.cache_hit = cache_hit
+    future.render_seconds = 0.0
+    return future
+
+
+# One renderer (and worker pool) per process
+RENDERER = ChartRenderer()
+
+
+def chart_png(kind, data, style=None, renderer=RENDERER):
+    """Return PNG bytes for a chart, rendering it only when it is not cached."""
+    return renderer.submit(kind, data, style).result()
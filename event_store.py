@@ -0,0 +1,126 @@
+import numpy as np
+from enum import IntEnum
+
+# One day in seconds (event timestamps are unix seconds)
+DAY = 86400
+
+
+class EventType(IntEnum):
+    """Kinds of workspace events, stored as uint8 codes in the event_type column."""
+    VIEW = 0
+    EDIT = 1
+    CREATE = 2
+    COMMENT = 3
+    REACTION = 4
+    MENTION = 5
+    SHARE = 6
+    KANBAN = 7
+    TASK = 8
+    DATABASE = 9
+    SEARCH = 10
+    SEARCH_CLICK = 11
+    INTEGRATION = 12
+
+
+# Column name -> dtype for every event column, in storage order (widest first,
+# so fixed-width records pack without padding)
+#   detail  dictionary code whose meaning depends on the event type (see
+#           DETAIL_DICTIONARY), -1 when unused
+#   value   VIEW: seconds spent on the page; SEARCH: number of results
+#   scroll  VIEW: scroll depth reached, in percent
+COLUMNS = {
+    "ts": np.int64,
+    "member": np.int32,
+    "page": np.int32,
+    "teamspace": np.int32,
+    "detail": np.int32,
+    "value": np.float32,
+    "event_type": np.uint8,
+    "scroll": np.uint8,
+}
+
+# Event type -> name list the detail column indexes into
+DETAIL_DICTIONARY = {
+    EventType.SEARCH: "queries",
+    EventType.SEARCH_CLICK: "queries",
+    EventType.SHARE: "teamspaces",
+    EventType.INTEGRATION: "integrations",
+}
+
+
+class EventStore:
+    """Columnar, time-sorted store of workspace events.
+
+    Every column is a NumPy array of the same length; members, pages,
+    teamspaces, search queries and integrations are dictionary-encoded as
+    integer codes into the name lists.
+    Events are kept sorted by timestamp so that a time window is a slice
+    (a view, never a copy) of every column. Pass assume_sorted=True when the
+    source guarantees the order, to skip the check (and any copy).
+    """
+
+    def __init__(
+        self,
+        columns,
+        members,
+        pages,
+        teamspaces,
+        page_teamspace=None,
+        queries=(),
+        integrations=(),
+        assume_sorted=False,
+    ):
+        missing = set(COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"missing event columns: {sorted(missing)}")
+        self.columns = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+        lengths = {len(col) for col in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("event columns must all have the same length")
+
+        # Sort by timestamp once up front; stable so equal timestamps keep their order
+        ts = self.columns["ts"]
+        if not assume_sorted and len(ts) > 1 and np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            self.columns = {name: col[order] for name, col in self.columns.items()}
+
+        self.members = list(members)
+        self.pages = list(pages)
+        self.teamspaces = list(teamspaces)
+        self.queries = list(queries)
+        self.integrations = list(integrations)
+        # Home teamspace of every page, when known
+        self.page_teamspace = None if page_teamspace is None else np.asarray(page_teamspace, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.columns["ts"])
+
+    def __getattr__(self, name):
+        # Expose columns as attributes: store.ts, store.member, ...
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def start_time(self):
+        return int(self.ts[0]) if len(self) else 0
+
+    @property
+    def end_time(self):
+        return int(self.ts[-1]) if len(self) else 0
+
+    def window(self, start, end):
+        """Return a slice covering events with start <= ts < end."""
+        lo, hi = np.searchsorted(self.ts, [start, end], side="left")
+        return slice(int(lo), int(hi))
+
+    def column(self, name, start=None, end=None):
+        """Return one column, optionally restricted to a time window (zero-copy)."""
+        col = self.columns[name]
+        if start is None and end is None:
+            return col
+        start = self.start_time if start is None else start
+        end = self.end_time + 1 if end is None else end
+        return col[self.window(start, end)]
+
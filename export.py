@@ -0,0 +1,292 @@
+"""Export all three dashboard tabs to one self-contained HTML file.
+
+Usage: python export.py [report.html] [days]
+
+Reads NOTION_ANALYTICS_EVENTS like the dashboard (the demo workspace
+without it) and shows every section for the last days days (90). The file
+needs no server: tables are inlined, charts are pre-rendered PNGs and
+every distinct image (chart or avatar) is embedded once, as a CSS class.
+
+Re-running is incremental: each section's HTML is kept next to the report
+(report.html.sections.json) with a digest of the aggregates it was built
+from, and only sections whose aggregates changed are rendered again. The
+page around them (e.g. the "through <date>" header) is always rebuilt; the
+report is only rewritten when the page came out different.
+"""
+import base64
+import datetime
+import hashlib
+import json
+import os
+import struct
+import sys
+
+from assets import avatar_css, tag_person_icons
+from blocks import (
+    CROSS_PRODUCT_MIX_COLORS,
+    CROSS_TEAM_MIX_COLORS,
+    DASHBOARD_CSS,
+    TEAM_MIX_COLORS,
+    content_cards_html,
+    cross_product_table_html,
+    cross_team_table_html,
+    engagement_table_html,
+    interactions_card_html,
+    member_card_html,
+    mix_chart_data,
+    query_searches_html,
+    searches_card_html,
+    stale_chart_data,
+    team_table_html,
+    teamspace_searches_html,
+    total_members_html,
+)
+from charts import RENDERER
+from event_store import DAY
+from snapshots import events_scheduler, preset_window
+
+DEFAULT_DAYS = 90
+
+# Bump when the sections' markup changes, so fragments of older exports are rebuilt
+EXPORT_FORMAT = 2
+
+# Page chrome around the dashboard's own CSS: the .stApp look, side-by-side
+# columns, CSS-only tabs (radio buttons) and the embedded charts
+EXPORT_CSS = """
+<style>
+    body { margin: 0; }
+    .stApp { min-height: 100vh; padding: 1rem 3rem; box-sizing: border-box; }
+    .row { display: flex; gap: 1rem; align-items: flex-start; }
+    .row > div { min-width: 0; }
+    .window { float: right; border: 1px solid #444444; border-radius: 4px; padding: 5px 10px;
+              font-size: 0.9rem; background-color: #1B2028; color: #2483E2; }
+    .caption { font-size: 0.875rem; color: #aaaaaa; }
+    .tabs > input { display: none; }
+    .tabs > label { display: inline-block; padding: 8px 16px; cursor: pointer; border-bottom: 2px solid #444444; }
+    .tabs > input:checked + label { border-bottom-color: #ff4b4b; color: #ff4b4b; }
+    .tab-panel { display: none; padding-top: 1rem; }
+    .chart { width: 100%; background: no-repeat center / contain; print-color-adjust: exact; -webkit-print-color-adjust: exact; }
+</style>
+"""
+
+
+# -------------------------------
+# Sections: (tab, name, metric, render). render(aggregate, days, charts)
+# returns the section's HTML; charts it shows are added to charts as
+# (kind, data) and stand in the HTML as _chart() placeholders.
+# -------------------------------
+def _member_cards(member_cards, days, charts):
+    cards = [
+        ("Active Members", "# Sessions", "members"),
+        ("Active Contributors", "# Edits", "contributors"),
+        ("Active Creators", "# Additions", "creators"),
+    ]
+    return (
+        _row([["<h3>Member Engagement</h3>", 2], [_window_label(days), 3]])
+        + total_members_html(member_cards, days)
+        + _row([
+            [member_card_html(title, member_cards["cards"][activity]["active"], label, member_cards["cards"][activity]["top"]), 1]
+            for title, label, activity in cards
+        ])
+    )
+
+
+def _activity_charts(series, days, charts):
+    titles = [
+        ("Active Members over time", "members"),
+        ("Active Contributors over time", "contributors"),
+        ("Active Creators over time", "creators"),
+    ]
+    return _row([[_chart(charts, "area", {"title": title, "y": series[activity]}), 1] for title, activity in titles])
+
+
+def _content_engagement(engagement, days, charts):
+    pages_card, sessions_card = content_cards_html(engagement)
+    return "<h3>Content Engagement</h3>" + _row([[pages_card, 1], [sessions_card, 1]]) + engagement_table_html(engagement)
+
+
+def _team_specific(team, days, charts):
+    card = interactions_card_html("Active Team Interactions", team["interactions"], team["change"], f"previous {days} days")
+    return (
+        _row([["<h3>Team-Specific</h3>", 1], [_window_label(days), 4]])
+        + _row([[card, 4.5], [_mix_chart(charts, team["mix"], TEAM_MIX_COLORS), 2]])
+        + team_table_html(team)
+    )
+
+
+def _cross_team(cross_team, days, charts):
+    card = interactions_card_html("Cross Team Interactions", cross_team["interactions"], cross_team["change"], f"previous {days} days")
+    return (
+        _row([["<h3>Cross-Team</h3>", 1], [_window_label(days), 4]])
+        + _row([[card, 4.5], [_mix_chart(charts, cross_team["mix"], CROSS_TEAM_MIX_COLORS), 2]])
+        + cross_team_table_html(cross_team)
+    )
+
+
+def _cross_product(cross_product, days, charts):
+    card = interactions_card_html(
+        "Cross Product Integrations", cross_product["integrations"], cross_product["change"], f"previous {days} days"
+    )
+    return (
+        _row([["<h3>Cross-Product</h3>", 1], [_window_label(days), 4]])
+        + _row([[card, 4.5], [_mix_chart(charts, cross_product["mix"], CROSS_PRODUCT_MIX_COLORS), 2]])
+        + cross_product_table_html(cross_product)
+    )
+
+
+def _searches(searches, days, charts):
+    return (
+        _row([["<h3>Discovery</h3>", 1], [_window_label(days), 4]])
+        + searches_card_html(searches, days)
+        + "<h4>Searches by Teamspace</h4>" + teamspace_searches_html(searches)
+        + "<h4>Searches by Content</h4>" + query_searches_html(searches)
+    )
+
+
+def _stale_content(stale, days, charts):
+    html = '<h4>Stale Content Watch</h4><div class="row"><div class="window" style="float: none;">All teamspaces</div></div>'
+    chart = stale_chart_data(stale)
+    if chart is not None:
+        html += _chart(charts, "barh", chart)
+    if stale["never_viewed"]:
+        html += f'<p class="caption">{stale["never_viewed"]} pages have never been viewed.</p>'
+    return html
+
+
+SECTIONS = [
+    ("Engagement", "member_cards", "member_cards", _member_cards),
+    ("Engagement", "charts", "activity_series", _activity_charts),
+    ("Engagement", "content_engagement", "content_engagement", _content_engagement),
+    ("Collaboration", "team_specific", "team_interactions", _team_specific),
+    ("Collaboration", "cross_team", "cross_team", _cross_team),
+    ("Collaboration", "cross_product", "cross_product", _cross_product),
+    ("Discovery", "searches", "searches", _searches),
+    ("Discovery", "stale_content", "stale_content", _stale_content),
+]
+
+
+def export(snapshot, path, days=DEFAULT_DAYS):
+    """Write snapshot's report to path; returns the names of the sections (re-)rendered.
+
+    Sections whose aggregates are unchanged since the last export to path
+    are reused as they were; charts of the others render concurrently.
+    """
+    manifest_path = path + ".sections.json"
+    manifest = {}
+    if os.path.exists(manifest_path) and os.path.exists(path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    if manifest.get("format") != EXPORT_FORMAT:
+        manifest = {}
+    previous = manifest.get("sections", {})
+
+    window = preset_window(snapshot.store, days)
+    sections, rendering = {}, []
+    for _, name, metric, render in SECTIONS:
+        value = snapshot.aggregate(metric, *((None,) if metric == "stale_content" else window))
+        digest = hashlib.sha1(json.dumps([name, days, value], sort_keys=True).encode()).hexdigest()
+        if name in previous and previous[name]["digest"] == digest:
+            sections[name] = previous[name]
+            continue
+        charts = []
+        html = render(value, days, charts)
+        rendering.append((name, digest, html, [RENDERER.submit(kind, data) for kind, data in charts]))
+
+    for name, digest, html, futures in rendering:
+        images = {}
+        for i, future in enumerate(futures):
+            png = future.result()
+            chart_class = _chart_class(png)
+            images[chart_class] = base64.b64encode(png).decode()
+            html = html.replace(_chart_slot(i), f'<div class="chart {chart_class}" style="aspect-ratio: {_aspect(png)};"></div>')
+        sections[name] = {"digest": digest, "html": tag_person_icons(html), "images": images}
+
+    page = _page(snapshot.store, days, sections)
+    page_digest = hashlib.sha1(page.encode()).hexdigest()
+    if rendering or page_digest != manifest.get("page"):
+        _write(path, page)
+        _write(manifest_path, json.dumps({"format": EXPORT_FORMAT, "page": page_digest, "sections": sections}))
+    return [name for name, *_ in rendering]
+
+
+def _page(store, days, sections):
+    # Every distinct chart once, however many sections show it
+    images = {name: b64 for section in sections.values() for name, b64 in section["images"].items()}
+    chart_css = "\n".join(f".{name} {{ background-image: url('data:image/png;base64,{b64}'); }}" for name, b64 in images.items())
+    tabs = list(dict.fromkeys(tab for tab, *_ in SECTIONS))
+    tab_css = "\n".join(f"#tab-{i}:checked ~ #panel-{i} {{ display: block; }}" for i in range(len(tabs)))
+    controls = "".join(
+        f'<input type="radio" name="tab" id="tab-{i}"{" checked" if i == 0 else ""}><label for="tab-{i}">{tab}</label>'
+        for i, tab in enumerate(tabs)
+    )
+    panels = "".join(
+        f'<div class="tab-panel" id="panel-{i}">'
+        + "".join(sections[name]["html"] for section_tab, name, *_ in SECTIONS if section_tab == tab)
+        + "</div>"
+        for i, tab in enumerate(tabs)
+    )
+    last_day = datetime.date(1970, 1, 1) + datetime.timedelta(days=store.end_time // DAY)
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Workspace Analytics</title>'
+        + DASHBOARD_CSS + avatar_css() + EXPORT_CSS
+        + f"<style>\n{tab_css}\n{chart_css}\n</style></head>\n"
+        + '<body><div class="stApp">'
+        + f'<h2>Workspace Analytics</h2><p class="caption">Last {days} days of activity, through {last_day.isoformat()}</p>'
+        + f'<div class="tabs">{controls}{panels}</div>'
+        + "</div></body></html>\n"
+    )
+
+
+def _row(cells):
+    """Side-by-side [html, width] cells, like st.columns(widths)."""
+    return '<div class="row">' + "".join(f'<div style="flex: {width};">{html}</div>' for html, width in cells) + "</div>"
+
+
+def _window_label(days):
+    return f'<div class="window">Last {days} Days</div>'
+
+
+def _chart(charts, kind, data):
+    charts.append((kind, data))
+    return _chart_slot(len(charts) - 1)
+
+
+def _mix_chart(charts, mix, colors):
+    data = mix_chart_data(mix, colors)
+    return "" if data is None else _chart(charts, "donut", data)
+
+
+def _chart_slot(i):
+    return f"<!--chart:{i}-->"
+
+
+def _chart_class(png):
+    # Named by content, so identical charts share one class
+    return "chart-" + hashlib.sha1(png).hexdigest()[:16]
+
+
+def _aspect(png):
+    # Width and height from the PNG's IHDR chunk
+    width, height = struct.unpack(">II", png[16:24])
+    return f"{width} / {height}"
+
+
+def _write(path, text):
+    # Readers on a file share never see a half-written report
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "report.html"
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DAYS
+    scheduler = events_scheduler(os.environ.get("NOTION_ANALYTICS_EVENTS"))
+    scheduler.refresh()
+    rendered = export(scheduler.current, path, days)
+    print(f"{path}: {len(rendered)} of {len(SECTIONS)} sections rendered" + (f" ({', '.join(rendered)})" if rendered else ""))
+
+
+if __name__ == "__main__":
+    main()
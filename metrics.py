@@ -0,0 +1,252 @@
+import numpy as np
+
+from event_store import DAY, EventType
+
+# Which event types count towards each member activity card
+MEMBER_ACTIVITY = {
+    "members": (EventType.VIEW,),
+    "contributors": (EventType.EDIT,),
+    "creators": (EventType.CREATE,),
+}
+
+# Event types that count as collaborating on a page (Collaboration tab)
+COLLABORATION = (
+    EventType.EDIT,
+    EventType.COMMENT,
+    EventType.REACTION,
+    EventType.MENTION,
+    EventType.SHARE,
+    EventType.KANBAN,
+    EventType.TASK,
+    EventType.DATABASE,
+)
+
+# How the interaction mix charts call each collaboration event type
+INTERACTION_NAMES = {
+    EventType.EDIT: "Edits",
+    EventType.COMMENT: "Comments",
+    EventType.REACTION: "Reactions",
+    EventType.MENTION: "Mentions",
+    EventType.SHARE: "Shares",
+    EventType.KANBAN: "Kanbans",
+    EventType.TASK: "Tasks",
+    EventType.DATABASE: "Databases",
+}
+
+
+def type_mask(event_type, types):
+    """Boolean mask of events whose type is in types (lookup table, no Python loop)."""
+    lut = np.zeros(256, dtype=bool)
+    lut[list(types)] = True
+    return lut[event_type]
+
+
+def window_events(store, types, start, end, rollup=None):
+    """Return (ts, member, teamspace, weight) for events of the given types in [start, end).
+
+    With a DailyRollup and a day-aligned window the rows come from the
+    rollup (ts is the start of each row's day and weight its event count);
+    otherwise they are sliced from the raw events and weight is None.
+    """
+    if rollup is not None and start % DAY == 0 and end % DAY == 0:
+        rows = rollup.rows(start // DAY, end // DAY)
+        mask = type_mask(rollup.event_type[rows], types)
+        return (
+            rollup.day[rows][mask].astype(np.int64) * DAY,
+            rollup.member[rows][mask],
+            rollup.teamspace[rows][mask],
+            rollup.count[rows][mask],
+        )
+    window = store.window(start, end)
+    mask = type_mask(store.event_type[window], types)
+    return store.ts[window][mask], store.member[window][mask], store.teamspace[window][mask], None
+
+
+def event_count(store, types, start, end, rollup=None):
+    """Number of events of the given types in [start, end)."""
+    ts, _, _, weight = window_events(store, types, start, end, rollup)
+    return len(ts) if weight is None else int(weight.sum())
+
+
+def top_actors(store, types, start, end, k=5, rollup=None, counts=None):
+    """Count distinct members with an event of the given types in [start, end).
+
+    Returns (active_count, rows) where rows are the k busiest members as
+    (name, event_count, top_teamspace_name), busiest first. Members can be
+    ranked (and their count reported) by other per-member counts instead,
+    e.g. sessions; the top teamspace still comes from their events.
+    """
+    _, member, teamspace, weight = window_events(store, types, start, end, rollup)
+
+    if counts is None:
+        counts = np.bincount(member, weights=weight, minlength=len(store.members)).astype(np.int64)
+    active = int(np.count_nonzero(counts))
+    top = _top_k(counts, min(k, active))
+
+    # Top teamspace only for the k selected members: one bincount over (rank, teamspace)
+    rank = np.full(len(store.members), -1, dtype=np.int64)
+    rank[top] = np.arange(len(top))
+    member_rank = rank[member]
+    picked = member_rank >= 0
+    n_teamspaces = len(store.teamspaces)
+    pair_counts = np.bincount(
+        member_rank[picked] * n_teamspaces + teamspace[picked],
+        weights=None if weight is None else weight[picked],
+        minlength=len(top) * n_teamspaces,
+    ).reshape(len(top), n_teamspaces)
+    top_teamspace = pair_counts.argmax(axis=1) if len(top) else []
+
+    rows = [
+        (store.members[m], int(counts[m]), store.teamspaces[t])
+        for m, t in zip(top, top_teamspace)
+    ]
+    return active, rows
+
+
+def active_series(store, types, start, end, buckets=10, rollup=None):
+    """Distinct active members per equal-width time bucket of [start, end)."""
+    ts, member, _, _ = window_events(store, types, start, end, rollup)
+    member = member.astype(np.int64)
+
+    bucket = ((ts - start) * buckets // max(end - start, 1)).astype(np.int64)
+    # Unique (bucket, member) pairs, then count members per bucket
+    pairs = np.unique(bucket * len(store.members) + member)
+    return np.bincount(pairs // len(store.members), minlength=buckets)[:buckets]
+
+
+def top_teamspaces(store, types, start, end, k=5, rollup=None):
+    """The k teamspaces with most events of the given types in [start, end).
+
+    Returns (teamspace_codes, counts), busiest first; teamspaces without
+    any such event are left out.
+    """
+    _, _, teamspace, weight = window_events(store, types, start, end, rollup)
+    counts = np.bincount(teamspace, weights=weight, minlength=len(store.teamspaces)).astype(np.int64)
+    top = _top_k(counts, min(k, int(np.count_nonzero(counts))))
+    return top, counts[top]
+
+
+def page_activity(store, start, end):
+    """Return (total_pages, active_pages) where active pages were touched in [start, end)."""
+    page = store.page[store.window(start, end)]
+    active = np.count_nonzero(np.bincount(page, minlength=len(store.pages)))
+    return len(store.pages), int(active)
+
+
+def member_home_teamspaces(store, rollup=None):
+    """Each member's home teamspace: the one most of their events are in (-1 if they have none)."""
+    if rollup is not None:
+        member, teamspace, weight = rollup.member, rollup.teamspace, rollup.count
+    else:
+        member, teamspace, weight = store.member, store.teamspace, None
+    return _mode_per_group(member, teamspace, len(store.members), len(store.teamspaces), weight)
+
+
+def cross_team_events(store, window, member_home):
+    """Cross-team interactions among the events in window (a slice of store).
+
+    An interaction is a share of a page into another teamspace, or an edit of
+    a page by a member whose home teamspace is another one. Returns
+    (positions in the window, page's teamspace, other teamspace).
+    """
+    event_type = store.event_type[window]
+    picked = np.flatnonzero(type_mask(event_type, (EventType.SHARE, EventType.EDIT)))
+    source = store.teamspace[window][picked]
+    target = np.where(
+        event_type[picked] == EventType.SHARE, store.detail[window][picked], member_home[store.member[window][picked]]
+    )
+    cross = (target >= 0) & (target != source)
+    return picked[cross], source[cross], target[cross]
+
+
+class TeamspaceInteractions:
+    """Sparse teamspace x teamspace matrix of cross-team interactions in [start, end).
+
+    Interactions are those of cross_team_events (home teamspaces from
+    member_home_teamspaces). Rows are the page's teamspace, columns the
+    other teamspace.
+    Only non-empty cells are stored (cells, counts, in COO form keyed by
+    row * n_teamspaces + column), so thousands of teamspaces cost nothing
+    extra; the per-cell top collaborator and shared page are only worked out
+    for the cells that are asked for.
+    """
+
+    # Up to this many cells, counting is one dense bincount instead of a sort
+    DENSE_CELLS = 1 << 22
+
+    def __init__(self, store, start, end, member_home):
+        self.store = store
+        window = store.window(start, end)
+        picked, source, target = cross_team_events(store, window, member_home)
+
+        n_teamspaces = len(store.teamspaces)
+        self.member = store.member[window][picked]
+        self.page = store.page[window][picked]
+        self.event_type = store.event_type[window][picked]
+        self.cell = source.astype(np.int64) * n_teamspaces + target
+        if n_teamspaces * n_teamspaces <= self.DENSE_CELLS:
+            dense = np.bincount(self.cell, minlength=n_teamspaces * n_teamspaces)
+            self.cells = np.flatnonzero(dense)
+            self.counts = dense[self.cells]
+        else:
+            self.cells, self.counts = np.unique(self.cell, return_counts=True)
+
+    @property
+    def total(self):
+        """Number of cross-team interactions in the window."""
+        return len(self.cell)
+
+    def per_type(self, types):
+        """Number of cross-team interactions of each of types."""
+        return np.bincount(self.event_type, minlength=256)[list(types)]
+
+    def top(self, n=5):
+        """The n busiest cells, busiest first, as
+        (teamspace, shared_page, shared_with, top_collaborator, interactions) name rows."""
+        store = self.store
+        top = _top_k(self.counts, min(n, len(self.cells)))
+        cells = self.cells[top]
+
+        # Interactions in the selected cells only, labelled with the cell's rank
+        order = np.argsort(cells)
+        position = np.minimum(np.searchsorted(cells[order], self.cell), max(len(cells) - 1, 0))
+        hit = np.flatnonzero(cells[order][position] == self.cell) if len(cells) else np.array([], dtype=np.int64)
+        rank = order[position[hit]]
+        top_member = _mode_per_group(rank, self.member[hit], len(cells), len(store.members))
+        top_page = _mode_per_group(rank, self.page[hit], len(cells), len(store.pages))
+
+        n_teamspaces = len(store.teamspaces)
+        return [
+            (
+                store.teamspaces[cell // n_teamspaces],
+                store.pages[page],
+                store.teamspaces[cell % n_teamspaces],
+                store.members[member],
+                int(count),
+            )
+            for cell, page, member, count in zip(
+                cells.tolist(), top_page.tolist(), top_member.tolist(), self.counts[top].tolist()
+            )
+        ]
+
+
+def _mode_per_group(group, value, n_groups, n_values, weight=None):
+    # Most frequent value of each group (-1 for empty groups) with a single sort:
+    # count (group, value) pairs, then keep the largest count within each group
+    keys, inverse = np.unique(group.astype(np.int64) * n_values + value, return_inverse=True)
+    counts = np.bincount(inverse, weights=weight)
+    groups = keys // n_values
+    order = np.lexsort((counts, groups))
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = groups[order][1:] != groups[order][:-1]
+    mode = np.full(n_groups, -1, dtype=np.int64)
+    mode[groups[order][last]] = keys[order][last] % n_values
+    return mode
+
+
+def _top_k(counts, k):
+    # Partial selection, then order only the k winners (largest count first)
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    top = np.argpartition(-counts, k - 1)[:k]
+    return top[np.argsort(-counts[top], kind="stable")]
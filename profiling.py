@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Counters the dashboard adds to the block being rendered (see RunProfile.add)
+COUNTERS = ("render_seconds", "html_bytes", "chart_cache_hits", "chart_cache_misses")
+
+
+class RunProfile:
+    """Wall time and counters of each dashboard section in one script run.
+
+    The dashboard calls start(tab) before a tab's section, lap(block) at the
+    end of each block inside it and stop() after it. A block's time is the
+    time since the previous lap, so a tab's blocks add up to its total.
+    Counters added with add() go to the block that is being rendered. Keys
+    are "Tab" and "Tab/block"; laps outside a tab use the block name alone.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.counters = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self._tab = None
+        self._tab_start = self._last = time.perf_counter()
+        self._pending = dict.fromkeys(COUNTERS, 0)
+
+    def start(self, tab):
+        self._tab = tab
+        self._tab_start = self._last = time.perf_counter()
+
+    def add(self, counter, value):
+        self._pending[counter] += value
+
+    def chart(self, future):
+        """Wait for a ChartRenderer future and count its render time and cache hit/miss."""
+        image = future.result()
+        self.add("render_seconds", getattr(future, "render_seconds", 0.0))
+        self.add("chart_cache_hits" if getattr(future, "cache_hit", False) else "chart_cache_misses", 1)
+        return image
+
+    def lap(self, block):
+        now = time.perf_counter()
+        key = f"{self._tab}/{block}" if self._tab else block
+        self.times[key] = self.times.get(key, 0.0) + now - self._last
+        self._flush(key)
+        self._last = now
+
+    def stop(self):
+        # A tab's counters are its blocks' plus anything added after the last lap
+        self.times[self._tab] = time.perf_counter() - self._tab_start
+        totals = self.counters[self._tab]
+        for key, counters in list(self.counters.items()):
+            if key.startswith(self._tab + "/"):
+                for name, value in counters.items():
+                    totals[name] += value
+        self._flush(self._tab)
+        self._tab = None
+
+    def _flush(self, key):
+        counters = self.counters[key]
+        for name, value in self._pending.items():
+            counters[name] += value
+        self._pending = dict.fromkeys(COUNTERS, 0)
+
+
+class ProfileRegistry:
+    """Process-wide totals of every finished RunProfile, exportable as Prometheus text."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.sections = defaultdict(lambda: {"runs": 0, "seconds": 0.0, "last_seconds": 0.0, **dict.fromkeys(COUNTERS, 0)})
+
+    def record(self, profile):
+        with self.lock:
+            self.runs += 1
+            for key, seconds in profile.times.items():
+                section = self.sections[key]
+                section["runs"] += 1
+                section["seconds"] += seconds
+                section["last_seconds"] = seconds
+                for name, value in profile.counters.get(key, {}).items():
+                    section[name] += value
+
+    def prometheus_text(self, gauges=None):
+        """Render the totals (and optional extra {name: value} gauges) in Prometheus text format."""
+        with self.lock:
+            sections = {key: dict(section) for key, section in self.sections.items()}
+            runs = self.runs
+        lines = [
+            "# HELP notion_analytics_runs_total Dashboard script runs.",
+            "# TYPE notion_analytics_runs_total counter",
+            f"notion_analytics_runs_total {runs}",
+        ]
+        metrics = [
+            ("section_runs_total", "runs", "counter", "Runs that computed the section."),
+            ("section_seconds_total", "seconds", "counter", "Wall time spent in the section."),
+            ("section_last_seconds", "last_seconds", "gauge", "Wall time of the section's last run."),
+            ("chart_render_seconds_total", "render_seconds", "counter", "Matplotlib render time of the section's charts."),
+            ("html_bytes_total", "html_bytes", "counter", "HTML bytes the section emitted through st.markdown."),
+            ("chart_cache_hits_total", "chart_cache_hits", "counter", "Section charts served from the chart cache."),
+            ("chart_cache_misses_total", "chart_cache_misses", "counter", "Section charts that had to be rendered."),
+        ]
+        for metric, field, kind, help_text in metrics:
+            lines.append(f"# HELP notion_analytics_{metric} {help_text}")
+            lines.append(f"# TYPE notion_analytics_{metric} {kind}")
+            for key in sorted(sections):
+                lines.append(f'notion_analytics_{metric}{{section="{_escape(key)}"}} {_number(sections[key][field])}')
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE notion_analytics_{name} gauge")
+            lines.append(f"notion_analytics_{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, gauges=None):
+        """Atomically write prometheus_text() to path (for a node_exporter textfile collector)."""
+        # Per-thread temporary file: concurrent sessions may finish runs at the same time
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text(gauges))
+        os.replace(tmp_path, path)
+
+
+def _number(value):
+    # Integers stay exact; floats keep full precision
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# One registry per process, shared by every session's reruns
+PROFILES = ProfileRegistry()
@@ -0,0 +1,86 @@
+import numpy as np
+
+from event_store import DAY, EventType
+
+
+class DailyRollup:
+    """Pre-aggregated per-day event counts keyed by member x teamspace x event type.
+
+    Rows are kept sorted by day, so any day-aligned window is a contiguous
+    slice and answering it costs O(rows in the window) instead of a rescan
+    of the raw events. update() only re-aggregates the newest (possibly
+    still open) day and the days after it.
+    """
+
+    def __init__(self):
+        self.day = np.empty(0, dtype=np.int32)
+        self.member = np.empty(0, dtype=np.int32)
+        self.teamspace = np.empty(0, dtype=np.int32)
+        self.event_type = np.empty(0, dtype=np.uint8)
+        self.count = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def build(cls, store):
+        rollup = cls()
+        rollup.update(store)
+        return rollup
+
+    def __len__(self):
+        return len(self.day)
+
+    @property
+    def last_day(self):
+        return int(self.day[-1]) if len(self) else None
+
+    def update(self, store):
+        """Fold store's events from the last aggregated day onwards into the cube."""
+        if not len(store):
+            return
+        # The last aggregated day may have been partial: drop it and redo it
+        from_day = self.last_day if len(self) else store.start_time // DAY
+        keep = np.searchsorted(self.day, from_day, side="left")
+        window = store.window(from_day * DAY, store.end_time + 1)
+
+        day, member, teamspace, event_type, count = _aggregate(
+            store.ts[window],
+            store.member[window],
+            store.teamspace[window],
+            store.event_type[window],
+            len(store.members),
+            len(store.teamspaces),
+        )
+        self.day = np.concatenate([self.day[:keep], day])
+        self.member = np.concatenate([self.member[:keep], member])
+        self.teamspace = np.concatenate([self.teamspace[:keep], teamspace])
+        self.event_type = np.concatenate([self.event_type[:keep], event_type])
+        self.count = np.concatenate([self.count[:keep], count])
+
+    def rows(self, start_day, end_day):
+        """Slice of rows for days in [start_day, end_day)."""
+        lo, hi = np.searchsorted(self.day, [start_day, end_day], side="left")
+        return slice(int(lo), int(hi))
+
+
+def _aggregate(ts, member, teamspace, event_type, n_members, n_teamspaces):
+    # Encode (day, teamspace, event type, member) as one int64 key; day is the
+    # most significant part so the unique keys come out sorted by day
+    if not len(ts):
+        empty = np.empty(0, dtype=np.int64)
+        return empty.astype(np.int32), empty.astype(np.int32), empty.astype(np.int32), empty.astype(np.uint8), empty
+    n_types = len(EventType)
+    day = ts // DAY
+    first_day = int(day[0])
+    key = (day - first_day) * n_teamspaces + teamspace
+    key = (key * n_types + event_type) * n_members + member
+    key, count = np.unique(key, return_counts=True)
+
+    member, key = key % n_members, key // n_members
+    event_type, key = key % n_types, key // n_types
+    teamspace, day = key % n_teamspaces, key // n_teamspaces + first_day
+    return (
+        day.astype(np.int32),
+        member.astype(np.int32),
+        teamspace.astype(np.int32),
+        event_type.astype(np.uint8),
+        count.astype(np.int64),
+    )
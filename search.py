@@ -0,0 +1,178 @@
+import numpy as np
+
+from event_store import DAY, EventType
+from sketches import KEY_STRIDE, _replace_tail
+from sessions import SESSION_GAP
+
+# A result click counts for the member's latest search of the same query at
+# most this many seconds before it (well inside one session)
+CLICK_WINDOW = min(10 * 60, SESSION_GAP)
+
+# Name -> event column the searches are grouped by
+SEARCH_GROUPS = {
+    "queries": "detail",
+    "teamspaces": "teamspace",
+}
+
+
+class SearchClicks:
+    """Day-partitioned search outcomes: clicked, zero-result or abandoned.
+
+    Every search is joined to the result clicks that follow it: a click
+    belongs to the member's latest earlier search of the same query, if
+    that search was at most CLICK_WINDOW seconds before. The join is one
+    sorted merge per chunk of the log: searches sorted by (member, query,
+    time) and each click placed among them with searchsorted, so the cost
+    is O((searches + clicks) log searches) and never a per-search lookup.
+    Chunks of chunk_size events keep memory flat on logs of hundreds of
+    millions of searches.
+
+    A search with results and no click is abandoned; a search without
+    results is zero-result (and can't be clicked). Outcomes are summed per
+    day and query/teamspace, so any day-aligned window is a slice.
+    """
+
+    def __init__(self, chunk_size=5_000_000, groups=SEARCH_GROUPS):
+        self.chunk_size = chunk_size
+        self.groups = groups
+        self.first_day = None
+        self.last_day = None
+        # Time of the latest event of the last update
+        self.end_time = None
+        # name -> (key, searches, clicked, zero_result) rows sorted by key,
+        # key being (day - first_day) * KEY_STRIDE + the group's code
+        self.rows = {
+            name: (np.empty(0, dtype=np.int64),) + tuple(np.empty(0, dtype=np.uint32) for _ in range(3))
+            for name in groups
+        }
+
+    @classmethod
+    def build(cls, store, **kwargs):
+        search_clicks = cls(**kwargs)
+        search_clicks.update(store)
+        return search_clicks
+
+    def update(self, store):
+        """Redo the outcomes from the last aggregated day onwards.
+
+        Searches up to CLICK_WINDOW before the last update's latest event
+        may have been judged before their click arrived, so their day is
+        redone too.
+        """
+        if not len(store):
+            return
+        if self.last_day is None:
+            from_day = store.start_time // DAY
+            self.first_day = from_day
+        else:
+            from_day = max(min(self.last_day, (self.end_time - CLICK_WINDOW) // DAY), self.first_day)
+        window = store.window(from_day * DAY, store.end_time + 1)
+
+        outcomes = [self._outcomes(store, slice(lo, min(lo + self.chunk_size, window.stop)))
+                    for lo in range(window.start, window.stop, self.chunk_size)]
+        day, detail, teamspace, clicked, zero = (np.concatenate(parts) for parts in zip(*outcomes))
+        codes = {"detail": detail, "teamspace": teamspace}
+        first = (from_day - self.first_day) * KEY_STRIDE
+        for name, column in self.groups.items():
+            code = codes[column]
+            valid = code >= 0
+            key = (day[valid] - self.first_day) * KEY_STRIDE + code[valid]
+            keys, inverse = np.unique(key, return_inverse=True)
+            fresh = (keys,) + tuple(
+                np.bincount(inverse, weights=weight, minlength=len(keys)).astype(np.uint32)
+                for weight in (None, clicked[valid], zero[valid])
+            )
+            self.rows[name] = _replace_tail(self.rows[name], first, fresh)
+        self.last_day = store.end_time // DAY
+        self.end_time = store.end_time
+
+    def rates(self, name, start, end, keys):
+        """Searches and outcome rates per key over the days covering [start, end).
+
+        Returns (searches, click_through, zero_result, abandoned) arrays
+        aligned with keys; rates are fractions of the searches, NaN without any.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        key, searches, clicked, zero = self._window(name, start, end)
+        code = key % KEY_STRIDE
+        size = max(int(code.max(initial=-1)), int(keys.max(initial=-1))) + 1
+        picked = np.maximum(keys, 0)
+        totals = [np.bincount(code, weights=count, minlength=size)[picked] * (keys >= 0)
+                  for count in (searches, clicked, zero)]
+        return _rates(*totals)
+
+    def total(self, start, end):
+        """Workspace-wide (searches, click_through, zero_result, abandoned) over [start, end)."""
+        _, *counts = self._window("queries", start, end)
+        searches, *rates = _rates(*(np.array([count.sum()], dtype=np.float64) for count in counts))
+        return (int(searches[0]), *(float(rate[0]) for rate in rates))
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for rows in self.rows.values() for array in rows)
+
+    def _window(self, name, start, end):
+        rows = self.rows[name]
+        if self.first_day is None:
+            return rows
+        first = max(start // DAY - self.first_day, 0) * KEY_STRIDE
+        last = max(-(-end // DAY) - self.first_day, 0) * KEY_STRIDE
+        window = slice(*np.searchsorted(rows[0], [first, last]))
+        return tuple(array[window] for array in rows)
+
+    def _outcomes(self, store, chunk):
+        # Searches in chunk; their clicks may come up to CLICK_WINDOW after the chunk,
+        # where later searches compete for them too
+        searches = chunk.start + np.flatnonzero(store.event_type[chunk] == EventType.SEARCH)
+        if not len(searches):
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty, np.empty(0, dtype=bool), np.empty(0, dtype=bool)
+        t0 = int(store.ts[searches[0]])
+        click_end = int(np.searchsorted(store.ts, int(store.ts[chunk.stop - 1]) + CLICK_WINDOW, side="right"))
+        reach = slice(int(searches[0]), max(click_end, chunk.stop))
+        event_type = store.event_type[reach]
+        candidates = reach.start + np.flatnonzero(event_type == EventType.SEARCH)
+        clicks = reach.start + np.flatnonzero(event_type == EventType.SEARCH_CLICK)
+
+        # (member, query) pair, then time since t0, in one int64 sort key
+        n_queries = int(store.detail[reach].max()) + 1
+        span = int(store.ts[reach.stop - 1]) - t0 + 1
+
+        def sort_key(rows):
+            pair = store.member[rows].astype(np.int64) * n_queries + store.detail[rows]
+            return pair, pair * span + (store.ts[rows] - t0)
+
+        search_pair, search_key = sort_key(candidates)
+        click_pair, click_key = sort_key(clicks)
+        order = np.argsort(search_key, kind="stable")
+        search_key, search_pair = search_key[order], search_pair[order]
+
+        # Each click's latest search at or before it: same pair and close enough
+        position = np.searchsorted(search_key, click_key, side="right") - 1
+        found = position >= 0
+        position = np.maximum(position, 0)
+        found &= search_pair[position] == click_pair
+        found &= click_key - search_key[position] <= CLICK_WINDOW
+        clicked = np.zeros(len(candidates), dtype=bool)
+        clicked[order[position[found]]] = True
+        clicked = clicked[:len(searches)]
+
+        zero = store.value[searches] == 0
+        return (
+            store.ts[searches] // DAY,
+            store.detail[searches].astype(np.int64),
+            store.teamspace[searches].astype(np.int64),
+            clicked & ~zero,
+            zero,
+        )
+
+
+def _rates(searches, clicked, zero):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (
+            searches.astype(np.int64),
+            clicked / searches,
+            zero / searches,
+            (searches - clicked - zero) / searches,
+        )
+
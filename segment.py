@@ -0,0 +1,277 @@
+import glob
+import json
+import os
+import struct
+
+import numpy as np
+
+from event_store import COLUMNS, EventStore
+
+# File layout of one segment:
+#   preamble  MAGIC (8 bytes) + header length (uint32) + reserved (uint32)
+#   header    UTF-8 JSON: format version, record dtype, dictionaries, index
+#   padding   up to the next DATA_ALIGN boundary
+#   records   fixed-width structured-dtype records, sorted by timestamp
+MAGIC = b"NAEVSEG1"
+VERSION = 2
+PREAMBLE = struct.Struct("<8sII")
+DATA_ALIGN = 4096
+
+
+def record_dtype():
+    """Fixed-width little-endian record layout for one event."""
+    return np.dtype([(name, np.dtype(dtype).newbyteorder("<")) for name, dtype in COLUMNS.items()], align=True)
+
+
+def write_segment(path, store):
+    """Write every event of store to a new, sealed segment file at path."""
+    dtype = record_dtype()
+    records = np.empty(len(store), dtype=dtype)
+    for name in COLUMNS:
+        records[name] = store.columns[name]
+
+    header = {
+        "version": VERSION,
+        "dtype": [[name, dtype.fields[name][0].str, dtype.fields[name][1]] for name in dtype.names],
+        "itemsize": dtype.itemsize,
+        "dictionaries": {
+            "members": store.members,
+            "pages": store.pages,
+            "teamspaces": store.teamspaces,
+            "queries": store.queries,
+            "integrations": store.integrations,
+        },
+        "page_teamspace": None if store.page_teamspace is None else store.page_teamspace.tolist(),
+        "index": {
+            "count": len(store),
+            "ts_min": store.start_time,
+            "ts_max": store.end_time,
+        },
+    }
+    _write(path, header, [records])
+
+
+def _write(path, header, chunks):
+    # Preamble, header and padding, then the records chunk by chunk
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    data_offset = _align(PREAMBLE.size + len(header_bytes), DATA_ALIGN)
+
+    # Write to a temporary name and rename, so readers never see a half-written segment
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header_bytes), 0))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_offset - PREAMBLE.size - len(header_bytes)))
+        for chunk in chunks:
+            f.write(np.ascontiguousarray(chunk).data)
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Return (header dict, data offset) of a segment without touching its records."""
+    with open(path, "rb") as f:
+        magic, header_len, _ = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an event segment")
+        header = json.loads(f.read(header_len))
+    if header["version"] != VERSION:
+        raise ValueError(f"{path}: unsupported segment version {header['version']}")
+    return header, _align(PREAMBLE.size + header_len, DATA_ALIGN)
+
+
+def open_segment(path):
+    """Open a segment as an EventStore whose columns are read-only memmap views.
+
+    Nothing is copied or parsed: the OS page cache backs the columns, so
+    several processes opening the same segment share one copy in memory.
+    """
+    header, data_offset = read_header(path)
+    records = _records(path, header, data_offset)
+    dictionaries = header["dictionaries"]
+    return EventStore(
+        {name: records[name] for name in COLUMNS},
+        dictionaries["members"],
+        dictionaries["pages"],
+        dictionaries["teamspaces"],
+        header["page_teamspace"],
+        dictionaries["queries"],
+        dictionaries["integrations"],
+        assume_sorted=True,
+    )
+
+
+def _records(path, header, data_offset):
+    # The segment's records as a read-only memmap (nothing is read yet)
+    dtype = np.dtype(
+        {
+            "names": [field[0] for field in header["dtype"]],
+            "formats": [field[1] for field in header["dtype"]],
+            "offsets": [field[2] for field in header["dtype"]],
+            "itemsize": header["itemsize"],
+        }
+    )
+    count = header["index"]["count"]
+    if not count:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=data_offset, shape=(count,))
+
+
+class EventLog:
+    """Append-only event log: a directory of sealed, numbered segments.
+
+    Dictionary codes are append-only across segments (a name keeps its code
+    forever), so the newest segment's dictionaries cover every segment.
+
+    append() writes one new segment and only reads the newest one's header.
+    compact() merges segments, streaming their records from disk to disk:
+    all of them, or (with fanout) size-tiered, fanout neighbouring segments
+    of a similar size at a time, so the log keeps O(fanout * log n)
+    segments for a bounded cost per merge. A merged segment is named after
+    the newest segment it holds and its header's index.base is the oldest,
+    so readers that listed the directory before the merged segments were
+    deleted skip them rather than count their events twice.
+
+    open() is zero-copy only for a log of one segment; with more, the
+    columns are copied together on every open.
+    """
+
+    # Segments of up to this many events are all in the first size tier
+    TIER_EVENTS = 1 << 16
+    # Records copied at a time when segments are merged
+    MERGE_CHUNK = 1 << 20
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def segment_paths(self):
+        return sorted(glob.glob(os.path.join(self.directory, "*.seg")))
+
+    def append(self, store):
+        """Seal store's events as the next segment of the log."""
+        segments = self._live()
+        if segments:
+            newest = read_header(segments[-1][0])[0]
+            if len(store) and store.start_time < newest["index"]["ts_max"]:
+                raise ValueError("appended events must not be older than the log's newest event")
+            for name, names in newest["dictionaries"].items():
+                if getattr(store, name)[:len(names)] != names:
+                    raise ValueError(f"{name} dictionary must extend the log's existing codes")
+        number = segments[-1][1] + 1 if segments else 1
+        write_segment(os.path.join(self.directory, f"{number:08d}.seg"), store)
+
+    def open(self):
+        """Open the whole log as one EventStore (zero-copy when it has a single segment)."""
+        segments = self._live()
+        if not segments:
+            raise FileNotFoundError(f"no segments in {self.directory}")
+        stores = [open_segment(path) for path, _, _ in segments]
+        return stores[0] if len(stores) == 1 else _merge(stores)
+
+    def compact(self, fanout=None):
+        """Merge all segments into one, or with fanout, size-tiered; returns the number of merges."""
+        merges = 0
+        while True:
+            segments, merged = self._segments()
+            # Left over by a compaction that stopped before deleting them
+            self._remove(merged)
+            run = self._tiered_run(segments, fanout) if fanout else segments
+            if len(run) <= 1:
+                return merges
+            self._merge_segments(run)
+            merges += 1
+            if not fanout:
+                return merges
+
+    def _tiered_run(self, segments, fanout):
+        # The oldest fanout neighbouring segments of the same size tier: up to
+        # TIER_EVENTS events is tier 0, and each tier up holds fanout times more
+        tiers = []
+        for path, _, _ in segments:
+            count, tier, limit = read_header(path)[0]["index"]["count"], 0, self.TIER_EVENTS
+            while count > limit:
+                tier, limit = tier + 1, limit * fanout
+            tiers.append(tier)
+        for i in range(len(segments) - fanout + 1):
+            if len(set(tiers[i:i + fanout])) == 1:
+                return segments[i:i + fanout]
+        return []
+
+    def _merge_segments(self, segments):
+        # Stream the records of neighbouring segments into one new segment, then drop them
+        headers = [read_header(path) for path, _, _ in segments]
+        newest = headers[-1][0]
+        counted = [header["index"] for header, _ in headers if header["index"]["count"]]
+        header = {
+            **newest,
+            "index": {
+                "count": sum(index["count"] for index in counted),
+                "ts_min": counted[0]["ts_min"] if counted else 0,
+                "ts_max": counted[-1]["ts_max"] if counted else 0,
+                "base": segments[0][2],
+            },
+        }
+        chunks = (
+            records[i:i + self.MERGE_CHUNK]
+            for (path, _, _), (segment_header, data_offset) in zip(segments, headers)
+            for records in [_records(path, segment_header, data_offset)]
+            for i in range(0, len(records), self.MERGE_CHUNK)
+        )
+        number, base = segments[-1][1], segments[0][2]
+        _write(os.path.join(self.directory, f"{number:08d}.{base:08d}.seg"), header, chunks)
+        self._remove(path for path, _, _ in segments)
+
+    def _live(self):
+        return self._segments()[0]
+
+    def _segments(self):
+        # (path, number, base) of the segments holding the log, oldest first,
+        # and the paths of those merged into another. A merged segment holds
+        # segments base..number; any other listed segment in that range was
+        # merged into it (and is about to be deleted).
+        segments = []
+        for path in self.segment_paths():
+            number = _number(path)
+            base = read_header(path)[0]["index"].get("base")
+            segments.append((path, number, number if base is None else base))
+        live, merged, oldest = [], [], None
+        # Newest first; of segments with the same number, the one holding the most
+        for segment in sorted(segments, key=lambda segment: (-segment[1], segment[2])):
+            if oldest is None or segment[1] < oldest:
+                live.append(segment)
+                oldest = segment[2]
+            else:
+                merged.append(segment[0])
+        return live[::-1], merged
+
+    def _remove(self, paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already removed by another compaction
+                pass
+
+
+def _merge(stores):
+    # One EventStore of stores' events, in order; the last store's dictionaries cover them all
+    newest = stores[-1]
+    columns = {name: np.concatenate([s.columns[name] for s in stores]) for name in COLUMNS}
+    return EventStore(
+        columns,
+        newest.members,
+        newest.pages,
+        newest.teamspaces,
+        newest.page_teamspace,
+        newest.queries,
+        newest.integrations,
+        assume_sorted=True,
+    )
+
+
+def _number(path):
+    return int(os.path.basename(path).split(".")[0])
+
+
+def _align(n, alignment):
+    return (n + alignment - 1) // alignment * alignment
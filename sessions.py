@@ -0,0 +1,118 @@
+import numpy as np
+
+from event_store import EventType
+
+# A member's views belong to one session until they pause for longer than this
+SESSION_GAP = 30 * 60
+
+
+class Sessions:
+    """Page-view sessions: runs of a member's views with no pause longer than gap seconds.
+
+    update() sessionizes the events it hasn't seen yet, chunk_size events at
+    a time, with one sort-and-diff pass per chunk: order the chunk's views
+    by member (stable, so each member's views stay in time order) and start
+    a new session wherever the member changes or the gap is exceeded. Each
+    member's last session stays open, as the next chunk may continue it;
+    all earlier ones are final. Logs bigger than memory (memory-mapped
+    segments) are therefore read one chunk at a time, and new events only
+    cost a pass over themselves.
+
+    A session counts towards the window its first view falls in. Engaged
+    sessions are the ones with more than one page view (no bounce).
+    """
+
+    def __init__(self, gap=SESSION_GAP, chunk_size=5_000_000):
+        self.gap = gap
+        self.chunk_size = chunk_size
+        # Events of the (append-only) log already sessionized
+        self.position = 0
+        # Closed sessions, sorted by start
+        self.member = np.empty(0, dtype=np.int32)
+        self.start = np.empty(0, dtype=np.int64)
+        self.views = np.empty(0, dtype=np.int32)
+        # Each member's open session (views == 0: none)
+        self.open_start = np.empty(0, dtype=np.int64)
+        self.open_end = np.empty(0, dtype=np.int64)
+        self.open_views = np.empty(0, dtype=np.int32)
+
+    @classmethod
+    def build(cls, store, **kwargs):
+        sessions = cls(**kwargs)
+        sessions.update(store)
+        return sessions
+
+    def update(self, store):
+        """Sessionize the events appended to store since the last update."""
+        self._grow(len(store.members))
+        closed = []
+        for lo in range(self.position, len(store), self.chunk_size):
+            chunk = slice(lo, min(lo + self.chunk_size, len(store)))
+            views = np.flatnonzero(store.event_type[chunk] == EventType.VIEW)
+            closed.append(self._sessionize(store.ts[chunk][views], store.member[chunk][views]))
+        self.position = len(store)
+        if closed:
+            members, starts, views = zip(*closed)
+            member = np.concatenate([self.member, *members])
+            start = np.concatenate([self.start, *starts])
+            views = np.concatenate([self.views, *views])
+            # Closed sessions arrive roughly in start order; a stable sort of that is cheap
+            order = np.argsort(start, kind="stable")
+            self.member, self.start, self.views = member[order], start[order], views[order]
+
+    def count(self, start, end):
+        """Return (sessions, engaged_sessions) starting in [start, end)."""
+        _, views = self._window(start, end)
+        return len(views), int(np.count_nonzero(views > 1))
+
+    def per_member(self, start, end):
+        """Number of sessions starting in [start, end) for every member."""
+        member, _ = self._window(start, end)
+        return np.bincount(member, minlength=len(self.open_views)).astype(np.int64)
+
+    def _window(self, start, end):
+        # Closed sessions in the window plus the open ones that started in it
+        closed = slice(*np.searchsorted(self.start, [start, end]))
+        is_open = (self.open_views > 0) & (self.open_start >= start) & (self.open_start < end)
+        return (
+            np.concatenate([self.member[closed], np.flatnonzero(is_open).astype(np.int32)]),
+            np.concatenate([self.views[closed], self.open_views[is_open]]),
+        )
+
+    def _grow(self, n_members):
+        # New members may have been added to the dictionary since the last update
+        extra = n_members - len(self.open_views)
+        if extra > 0:
+            self.open_start = np.concatenate([self.open_start, np.zeros(extra, dtype=np.int64)])
+            self.open_end = np.concatenate([self.open_end, np.zeros(extra, dtype=np.int64)])
+            self.open_views = np.concatenate([self.open_views, np.zeros(extra, dtype=np.int32)])
+
+    def _sessionize(self, ts, member):
+        # Open sessions go first as one row each, so they can absorb the chunk's first views
+        carried = np.flatnonzero(self.open_views > 0)
+        member = np.concatenate([carried, member]).astype(np.int32)
+        first_ts = np.concatenate([self.open_start[carried], ts])
+        last_ts = np.concatenate([self.open_end[carried], ts])
+        views = np.concatenate([self.open_views[carried], np.ones(len(ts), dtype=np.int32)])
+
+        order = np.argsort(member, kind="stable")
+        member, first_ts, last_ts, views = member[order], first_ts[order], last_ts[order], views[order]
+        new = np.ones(len(member), dtype=bool)
+        new[1:] = (member[1:] != member[:-1]) | (first_ts[1:] - last_ts[:-1] > self.gap)
+        starts = np.flatnonzero(new)
+        if not len(starts):
+            return member[:0], first_ts[:0], views[:0]
+
+        session_member = member[starts]
+        session_start = first_ts[starts]
+        session_end = last_ts[np.append(starts[1:], len(member)) - 1]
+        session_views = np.add.reduceat(views, starts).astype(np.int32)
+
+        # Each member's last session stays open; the rest are final
+        last = np.ones(len(starts), dtype=bool)
+        last[:-1] = session_member[1:] != session_member[:-1]
+        open_member = session_member[last]
+        self.open_start[open_member] = session_start[last]
+        self.open_end[open_member] = session_end[last]
+        self.open_views[open_member] = session_views[last]
+        return session_member[~last], session_start[~last], session_views[~last]
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+
+from aggregates import METRICS, Workspace
+from event_store import DAY
+from segment import EventLog, open_segment
+from synthetic import demo_store
+
+# Windows precomputed into every snapshot: the last N days up to the latest event
+PRESET_DAYS = (7, 30, 90, 365)
+
+
+class Snapshot:
+    """Every preset window's aggregates of one version of the workspace.
+
+    All of it is computed before the snapshot is published and nothing
+    changes afterwards, so readers never wait or lock. aggregate() falls
+    back to computing (through the workspace and its cache) only for
+    arguments that weren't precomputed, e.g. custom date ranges.
+    """
+
+    def __init__(self, workspace, aggregates, built_at, build_seconds):
+        self.workspace = workspace
+        self.aggregates = aggregates
+        self.built_at = built_at
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def build(cls, workspace, preset_days=PRESET_DAYS):
+        start = time.perf_counter()
+        aggregates = {key: METRICS[key[0]](workspace, *key[1:]) for key in snapshot_keys(workspace.store, preset_days)}
+        return cls(workspace, aggregates, time.time(), time.perf_counter() - start)
+
+    @property
+    def store(self):
+        return self.workspace.store
+
+    @property
+    def age(self):
+        """Seconds since the snapshot was published."""
+        return time.time() - self.built_at
+
+    def aggregate(self, metric, *args):
+        value = self.aggregates.get((metric, *args))
+        return self.workspace.aggregate(metric, *args) if value is None else value
+
+
+def preset_window(store, days):
+    """[start, end) of the last days days up to the latest event, in seconds."""
+    last_day = store.end_time // DAY
+    return (last_day + 1 - days) * DAY, (last_day + 1) * DAY
+
+
+def snapshot_keys(store, preset_days=PRESET_DAYS):
+    """(metric, *args) of every aggregate a snapshot precomputes."""
+    windows = [preset_window(store, days) for days in preset_days]
+    for metric in METRICS:
+        if metric == "stale_content":
+            # Not windowed: one per teamspace filter
+            for teamspace in [None, *range(len(store.teamspaces))]:
+                yield metric, teamspace
+        else:
+            for window in windows:
+                yield (metric, *window)
+
+
+class SnapshotScheduler:
+    """Keeps a current Snapshot, rebuilt in a background thread when events land.
+
+    Every interval seconds the worker asks version() whether the event
+    source changed (e.g. the segment list of an event log); if so it opens
+    the store, brings a copy of the current snapshot's indexes up to date,
+    precomputes every preset aggregate and only then swaps the new
+    snapshot in (a single reference assignment). The old snapshot stays
+    intact for readers still holding it: there are two buffers, one being
+    read and one being built. Without version(), the store is reopened and
+    compared by size every time.
+    """
+
+    def __init__(self, open_store, name="workspace", interval=60, version=None, preset_days=PRESET_DAYS):
+        self.open_store = open_store
+        self.name = name
+        self.interval = interval
+        self.version = version
+        self.preset_days = preset_days
+        self.current = None
+        self.builds = 0
+        self.last_error = None
+        self._version = None
+        self._stopped = threading.Event()
+        self._thread = None
+        # One build at a time (the worker and explicit refresh() calls)
+        self._build_lock = threading.Lock()
+
+    def start(self):
+        """Build the first snapshot (blocking) and start refreshing in the background."""
+        if self.current is None:
+            self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def refresh(self, force=False):
+        """Build and publish a new snapshot if the events changed; returns whether it did."""
+        with self._build_lock:
+            version = self.version() if self.version is not None else None
+            if not force and self.current is not None and self.version is not None and version == self._version:
+                return False
+            store = self.open_store()
+            current = self.current
+            if not force and current is not None and _size(store) == _size(current.store):
+                self._version = version
+                return False
+            workspace = Workspace(store, self.name) if current is None else current.workspace.updated(store)
+            snapshot = Snapshot.build(workspace, self.preset_days)
+            self.current = snapshot
+            self._version = version
+            self.builds += 1
+            return True
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as error:
+                # Keep serving the last good snapshot; try again next interval
+                self.last_error = repr(error)
+
+    def stats(self):
+        snapshot = self.current
+        return {
+            "snapshot_age_seconds": snapshot.age if snapshot else 0.0,
+            "snapshot_build_seconds": snapshot.build_seconds if snapshot else 0.0,
+            "snapshot_builds": self.builds,
+            "snapshot_events": len(snapshot.store) if snapshot else 0,
+            "snapshot_aggregates": len(snapshot.aggregates) if snapshot else 0,
+        }
+
+
+def events_scheduler(path, interval=60):
+    """A SnapshotScheduler over an event log directory, a single segment file or (path None) the demo workspace.
+
+    Not started yet. A log's snapshot is rebuilt when segments are added to
+    it; a segment file or the demo never changes, so its first snapshot is kept.
+    """
+    if path is None:
+        store = demo_store()
+        return SnapshotScheduler(lambda: store, name="demo", interval=interval, version=lambda: None)
+    if os.path.isdir(path):
+        log = EventLog(path)
+        return SnapshotScheduler(log.open, name=path, interval=interval, version=lambda: tuple(log.segment_paths()))
+    store = open_segment(path)
+    return SnapshotScheduler(lambda: store, name=path, interval=interval, version=lambda: None)
+
+
+def _size(store):
+    return len(store), store.end_time
@@ -0,0 +1,98 @@
+import numpy as np
+
+from event_store import EventType
+
+
+class LastViewed:
+    """When every page was last viewed, kept in stalest-first order.
+
+    update() reads only the events appended since the last update. Events
+    arrive in time order, so pages viewed in them are now the freshest of
+    all: they move, sorted among themselves, to the end of the order and
+    everything else keeps its place. Per-teamspace orders are the same
+    order partitioned by teamspace (stable), with an offset table.
+
+    The N stalest pages are then the first N of an order, and a minimum
+    age is a searchsorted on it: O(N + log pages) per query, however many
+    pages the workspace has. Pages never viewed aren't ranked; see
+    never_viewed().
+    """
+
+    def __init__(self):
+        self.position = 0
+        # Per page: last view time (-1: never viewed) and teamspace (of its last view)
+        self.last_view = np.empty(0, dtype=np.int64)
+        self.teamspace = np.empty(0, dtype=np.int32)
+        # Viewed pages, stalest first, and the same pages grouped by teamspace
+        self.order = np.empty(0, dtype=np.int64)
+        self.by_teamspace = np.empty(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def build(cls, store):
+        last_viewed = cls()
+        last_viewed.update(store)
+        return last_viewed
+
+    def update(self, store):
+        """Fold in the views appended to store since the last update."""
+        extra = len(store.pages) - len(self.last_view)
+        if extra > 0:
+            self.last_view = np.concatenate([self.last_view, np.full(extra, -1, dtype=np.int64)])
+            known = store.page_teamspace
+            added = np.full(extra, -1, dtype=np.int32) if known is None else known[len(self.teamspace):]
+            self.teamspace = np.concatenate([self.teamspace, added])
+        new = slice(self.position, len(store))
+        self.position = len(store)
+        views = new.start + np.flatnonzero(store.event_type[new] == EventType.VIEW)
+        if not len(views):
+            return
+
+        # Last view of each page among the new events (they are in time order)
+        latest = np.full(len(self.last_view), -1, dtype=np.int64)
+        np.maximum.at(latest, store.page[views], views)
+        pages = np.flatnonzero(latest >= 0)
+        last = latest[pages]
+        seen_before = self.last_view[pages] >= 0
+        self.last_view[pages] = store.ts[last]
+        self.teamspace[pages] = store.teamspace[last]
+
+        fresh = pages[np.argsort(self.last_view[pages], kind="stable")]
+        if seen_before.any():
+            moved = np.zeros(len(self.last_view), dtype=bool)
+            moved[pages[seen_before]] = True
+            self.order = self.order[~moved[self.order]]
+        self.order = np.concatenate([self.order, fresh])
+
+        team = self.teamspace[self.order]
+        grouped = np.argsort(team, kind="stable")
+        self.by_teamspace = self.order[grouped]
+        n_teamspaces = max(len(store.teamspaces), int(team.max(initial=-1)) + 1)
+        self.offsets = np.searchsorted(team[grouped], np.arange(-1, n_teamspaces + 1))
+
+    def stalest(self, k, teamspace=None, before=None):
+        """Return (pages, last_view) of the k stalest viewed pages, stalest first.
+
+        teamspace restricts them to one teamspace's pages; before keeps only
+        pages not viewed since that time (a minimum age).
+        """
+        order = self._order(teamspace)
+        if before is not None:
+            order = order[:np.searchsorted(self.last_view[order], before)]
+        pages = order[:k]
+        return pages, self.last_view[pages]
+
+    def never_viewed(self, teamspace=None):
+        """Number of pages (in a teamspace) without any view yet."""
+        unviewed = self.last_view < 0
+        if teamspace is not None:
+            unviewed &= self.teamspace == teamspace
+        return int(np.count_nonzero(unviewed))
+
+    def _order(self, teamspace):
+        if teamspace is None:
+            return self.order
+        # offsets[i] starts teamspace i - 1 (the first group is pages without one)
+        if not 0 <= teamspace < len(self.offsets) - 2:
+            return self.order[:0]
+        return self.by_teamspace[self.offsets[teamspace + 1]:self.offsets[teamspace + 2]]
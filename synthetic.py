@@ -0,0 +1,341 @@
+import itertools
+
+import numpy as np
+
+from event_store import COLUMNS, DAY, EventStore, EventType
+from segment import EventLog
+
+# Default "now" of generated workspaces (fixed, so runs are reproducible)
+END_TIME = 1_700_006_400  # 2023-11-15 00:00 UTC
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Dana", "Eve", "Frank", "Grace", "Hank", "Ivy", "Jack",
+    "Zoe", "Liam", "Emma", "Noah", "Olivia", "Ava", "William", "Sophia", "Mason", "Isabella",
+]
+LAST_NAMES = [
+    "Wu", "Smith", "Garcia", "Kim", "Patel", "Nguyen", "Khan", "Silva", "Cohen", "Okafor",
+    "Rossi", "Novak", "Tanaka", "Larsen", "Moreau", "Schmidt", "Reyes", "Ali", "Brown", "Park",
+]
+TEAMSPACE_NAMES = [
+    "General", "Product", "Engineering", "Marketing", "Finance", "HR", "Analytics", "Data",
+    "Strategy", "People", "Operations", "BizOps", "Design", "Sales", "Support", "Legal",
+]
+PAGE_TOPICS = [
+    "Roadmap", "Handbook", "Sprint Notes", "Budget", "Meeting Notes", "FAQ", "Launch Plan",
+    "Metrics", "Onboarding", "Retro", "Policies", "Updates", "Research", "Backlog", "OKRs",
+]
+QUERY_WORDS = [
+    "budget", "forecast", "roadmap", "product", "updates", "engineering", "marketing", "trends",
+    "hr", "policies", "quarterly", "report", "onboarding", "sprint", "planning", "design",
+]
+INTEGRATIONS = ["Figma", "Slack", "Github", "Jira", "Google Drive", "Zoom", "Loom", "Miro"]
+
+# Share of each event type before member propensities are applied
+TYPE_MIX = {
+    EventType.VIEW: 0.62,
+    EventType.EDIT: 0.12,
+    EventType.CREATE: 0.015,
+    EventType.COMMENT: 0.04,
+    EventType.REACTION: 0.03,
+    EventType.MENTION: 0.02,
+    EventType.SHARE: 0.015,
+    EventType.KANBAN: 0.015,
+    EventType.TASK: 0.02,
+    EventType.DATABASE: 0.01,
+    EventType.SEARCH: 0.09,
+    EventType.INTEGRATION: 0.015,
+}
+
+
+class SyntheticWorkspace:
+    """Seeded generator of realistic workspace activity, fully vectorized.
+
+    Members, pages, teamspaces and search queries get power-law (Zipf-like)
+    popularity; members mostly work in their home teamspace, only some of
+    them edit or create, and views have bimodal scroll depth (skimmers vs
+    readers) with log-normal dwell time. Searches are followed by result
+    clicks at a per-query click-through rate, shares target another
+    teamspace, and activity follows a weekday/working-hours rhythm with
+    slow growth.
+
+    members, pages, teamspaces and queries are counts or name lists.
+    """
+
+    def __init__(self, members=1000, pages=10000, teamspaces=40, queries=2000, integrations=INTEGRATIONS, seed=0):
+        rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.members = _names(members, _person_names)
+        self.teamspaces = _names(teamspaces, _teamspace_names)
+        self.pages = list(pages) if not isinstance(pages, int) else None
+        self.queries = _names(queries, _query_names)
+        self.integrations = list(integrations)
+        n_members, n_teamspaces = len(self.members), len(self.teamspaces)
+        n_pages = pages if isinstance(pages, int) else len(pages)
+
+        # Teamspace sizes and page/query/integration popularity follow power laws
+        teamspace_weights = _zipf_weights(n_teamspaces, 1.0, rng)
+        self.page_popularity = PowerLaw(n_pages, 1.0, rng)
+        self.query_popularity = PowerLaw(len(self.queries), 1.1, rng)
+        self.member_activity = PowerLaw(n_members, 1.1, rng)
+        self.page_teamspace = np.sort(rng.choice(n_teamspaces, n_pages, p=teamspace_weights)).astype(np.int32)
+        if self.pages is None:
+            self.pages = _page_names(self.page_teamspace, self.teamspaces)
+        # Pages are grouped by teamspace; within a group lower index = more popular
+        self.teamspace_page_start = np.searchsorted(self.page_teamspace, np.arange(n_teamspaces))
+        self.teamspace_page_count = np.bincount(self.page_teamspace, minlength=n_teamspaces)
+        self.integration_weights = _zipf_weights(len(self.integrations), 1.2, rng)
+        # Each query's click-through rate; some queries (rarely) find nothing at all
+        self.query_ctr = rng.beta(2, 5, len(self.queries))
+        self.query_no_results = rng.random(len(self.queries)) < 0.08
+
+        # Members: activity level, home teamspace and how much they edit/create
+        self.member_home = rng.choice(n_teamspaces, n_members, p=teamspace_weights).astype(np.int32)
+        self.member_edit_rate = rng.beta(0.6, 1.4, n_members)
+        self.member_create_rate = rng.beta(0.3, 3.0, n_members)
+
+        self.type_codes = np.array(list(TYPE_MIX), dtype=np.uint8)
+        self.type_weights = np.array(list(TYPE_MIX.values()))
+        self.type_weights /= self.type_weights.sum()
+
+    def chunks(self, n_events, days=365, end_time=END_TIME, chunk_size=5_000_000):
+        """Yield EventStores of consecutive whole days holding about chunk_size events each.
+
+        Chunks are time-ordered, so concatenating them gives a sorted log. A
+        day with more than chunk_size events is yielded as one chunk.
+        """
+        rng = np.random.default_rng([self.seed, n_events, days])
+        first_day = end_time // DAY - days
+        per_day = rng.multinomial(n_events, _day_weights(first_day, days))
+
+        day = 0
+        while day < days:
+            # Extend the chunk day by day until it reaches chunk_size events
+            cumulative = np.cumsum(per_day[day:])
+            last = day + max(int(np.searchsorted(cumulative, chunk_size, side="right")), 1)
+            counts = per_day[day:last]
+            if counts.sum():
+                yield self._chunk(rng, first_day + day, counts)
+            day = last
+
+    def store(self, n_events, days=365, end_time=END_TIME, chunk_size=5_000_000):
+        """Generate the whole workspace into one in-memory EventStore."""
+        parts = list(self.chunks(n_events, days, end_time, chunk_size))
+        columns = {name: np.concatenate([part.columns[name] for part in parts]) for name in COLUMNS}
+        return self._store(columns)
+
+    def write_log(self, directory, n_events, days=365, end_time=END_TIME, chunk_size=5_000_000, compact=False):
+        """Generate the workspace straight to an on-disk EventLog, one segment per chunk."""
+        log = EventLog(directory)
+        for part in self.chunks(n_events, days, end_time, chunk_size):
+            log.append(part)
+        if compact:
+            log.compact()
+        return log
+
+    def _store(self, columns):
+        return EventStore(
+            columns,
+            self.members,
+            self.pages,
+            self.teamspaces,
+            self.page_teamspace,
+            self.queries,
+            self.integrations,
+            assume_sorted=True,
+        )
+
+    def _chunk(self, rng, first_day, counts):
+        n = int(counts.sum())
+        # Timestamps: working-hours peak around 14:00 UTC, sorted within the chunk
+        seconds = np.clip(rng.normal(14 * 3600, 3.5 * 3600, n), 0, DAY - 1).astype(np.int64)
+        ts = np.repeat(np.arange(first_day, first_day + len(counts), dtype=np.int64), counts) * DAY + seconds
+        ts.sort()
+
+        member = self.member_activity.sample(rng, n)
+        event_type = self.type_codes[_sample(rng, self.type_weights, n)]
+        # Only some members edit or create; everyone else just reads
+        u = rng.random(n)
+        event_type[(event_type == EventType.EDIT) & (u > self.member_edit_rate[member])] = EventType.VIEW
+        event_type[(event_type == EventType.CREATE) & (u > self.member_create_rate[member])] = EventType.VIEW
+
+        # Pages: 80% in the member's home teamspace (skewed to its popular pages), else workspace-wide
+        home = self.member_home[member]
+        home_count = self.teamspace_page_count[home]
+        in_home = (rng.random(n) < 0.8) & (home_count > 0)
+        local = (rng.random(n) ** 2 * home_count).astype(np.int64)
+        page = np.where(
+            in_home,
+            self.teamspace_page_start[home] + np.minimum(local, np.maximum(home_count - 1, 0)),
+            self.page_popularity.sample(rng, n),
+        ).astype(np.int32)
+
+        columns = {
+            "ts": ts,
+            "member": member.astype(np.int32),
+            "page": page,
+            "teamspace": self.page_teamspace[page],
+            "detail": np.full(n, -1, dtype=np.int32),
+            "value": np.zeros(n, dtype=np.float32),
+            "event_type": event_type,
+            "scroll": np.zeros(n, dtype=np.uint8),
+        }
+        self._fill_details(rng, columns)
+        clicks = self._search_clicks(rng, columns, end=(first_day + len(counts)) * DAY)
+
+        # Merge the (few, sorted) clicks into the sorted events without re-sorting everything
+        order = np.argsort(clicks["ts"], kind="stable")
+        at = np.searchsorted(ts, clicks["ts"][order], side="right") + np.arange(len(order))
+        is_click = np.zeros(n + len(order), dtype=bool)
+        is_click[at] = True
+        merged = {}
+        for name in COLUMNS:
+            merged[name] = np.empty(n + len(order), dtype=COLUMNS[name])
+            merged[name][is_click] = clicks[name][order]
+            merged[name][~is_click] = columns[name]
+        return self._store(merged)
+
+    def _fill_details(self, rng, columns):
+        event_type, detail, value = columns["event_type"], columns["detail"], columns["value"]
+
+        # Views: bimodal scroll depth (skimmers stop early, readers finish) and log-normal dwell time
+        views = np.flatnonzero(event_type == EventType.VIEW)
+        reader = rng.random(len(views)) < 0.55
+        depth = rng.standard_exponential(len(views)) * np.where(reader, -8.0, 18.0) + np.where(reader, 100.0, 0.0)
+        columns["scroll"][views] = np.clip(depth, 0, 100).astype(np.uint8)
+        value[views] = np.exp(rng.standard_normal(len(views)) * 0.75 + np.where(reader, 5.5, 3.5))
+
+        # Searches: query and result count (0 for queries that find nothing)
+        searches = np.flatnonzero(event_type == EventType.SEARCH)
+        query = self.query_popularity.sample(rng, len(searches))
+        detail[searches] = query
+        value[searches] = np.where(self.query_no_results[query], 0, rng.integers(1, 50, len(searches)))
+
+        # Shares: target another teamspace than the page's own
+        shares = np.flatnonzero(event_type == EventType.SHARE)
+        n_teamspaces = len(self.teamspaces)
+        if n_teamspaces > 1:
+            offset = rng.integers(1, n_teamspaces, len(shares))
+            detail[shares] = (columns["teamspace"][shares] + offset) % n_teamspaces
+        else:
+            columns["event_type"][shares] = EventType.VIEW
+
+        integrations = np.flatnonzero(event_type == EventType.INTEGRATION)
+        detail[integrations] = _sample(rng, self.integration_weights, len(integrations))
+
+    def _search_clicks(self, rng, columns, end):
+        # A search with results is followed by a click on a result at its query's rate
+        searches = np.flatnonzero(columns["event_type"] == EventType.SEARCH)
+        query = columns["detail"][searches]
+        clicked = searches[(columns["value"][searches] > 0) & (rng.random(len(searches)) < self.query_ctr[query])]
+        n = len(clicked)
+        # Usually the page being searched for, sometimes another popular page
+        page = np.where(rng.random(n) < 0.85, columns["page"][clicked], self.page_popularity.sample(rng, n))
+        return {
+            "ts": np.minimum(columns["ts"][clicked] + rng.integers(2, 90, n), end - 1),
+            "member": columns["member"][clicked],
+            "page": page.astype(np.int32),
+            "teamspace": self.page_teamspace[page],
+            "detail": columns["detail"][clicked],
+            "value": np.zeros(n, dtype=np.float32),
+            "event_type": np.full(n, EventType.SEARCH_CLICK, dtype=np.uint8),
+            "scroll": np.zeros(n, dtype=np.uint8),
+        }
+
+
+class PowerLaw:
+    """Draw item codes whose popularity follows rank^-exponent, in O(1) per draw.
+
+    Ranks come from the closed-form inverse CDF of a continuous power law
+    (no searchsorted over a weight table), then map to item codes through a
+    fixed random permutation so codes don't encode popularity.
+    """
+
+    def __init__(self, n, exponent, rng):
+        self.n = n
+        self.exponent = exponent
+        self.items = rng.permutation(n).astype(np.int32)
+
+    def sample(self, rng, size):
+        u = rng.random(size)
+        if abs(self.exponent - 1.0) < 1e-9:
+            rank = np.exp(u * np.log(self.n + 1))
+        else:
+            a = 1.0 - self.exponent
+            rank = ((self.n + 1) ** a - 1.0) * u + 1.0
+            rank = rank ** (1.0 / a)
+        return self.items[np.minimum(rank.astype(np.int64) - 1, self.n - 1)]
+
+
+# Demo workspace (names match the ones the dashboard was designed with)
+DEMO_MEMBERS = [
+    "Alice", "Bob", "Charlie", "Dana", "Eve", "Zoe", "Rebecca", "Fig", "Nicole Wu", "Stephanie",
+    "Sohrab A...", "Frank", "Grace", "Hank", "Ivy", "Jack", "Liam", "Emma", "Noah", "Olivia",
+] + [f"Member {i}" for i in range(21, 99)]
+DEMO_TEAMSPACES = [
+    "General", "Product", "Finance", "People", "Engineering", "Marketing",
+    "Analytics", "Data", "HR", "Strategy", "Operations", "BizOps"
+]
+DEMO_PAGES = [
+    "Product Roadmap", "Product Updates", "Feature Releases", "Beta Testing", "Product Design",
+    "User Feedback", "Quality Assurance", "Product Metrics", "Innovation Lab", "Product Strategy",
+    "Sprint Overview", "Budget Report",
+]
+
+def demo_store():
+    """The demo workspace's events: 200k events over two years."""
+    workspace = SyntheticWorkspace(members=DEMO_MEMBERS, pages=DEMO_PAGES, teamspaces=DEMO_TEAMSPACES, queries=200)
+    return workspace.store(200_000, days=2 * 365)
+
+
+def _sample(rng, weights, n):
+    # Inverse-CDF sampling for small categorical distributions
+    cdf = np.cumsum(weights)
+    return np.minimum(np.searchsorted(cdf, rng.random(n) * cdf[-1], side="right"), len(weights) - 1)
+
+
+def _zipf_weights(n, exponent, rng):
+    # Weight of rank r is r^-exponent; ranks are shuffled so codes don't encode popularity
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    return rng.permutation(weights / weights.sum())
+
+
+def _day_weights(first_day, days):
+    # Weekends are quiet and activity grows ~50% over the period
+    day = np.arange(first_day, first_day + days)
+    weekday = (day + 3) % 7  # 1970-01-01 was a Thursday; 0 = Monday
+    weights = np.where(weekday >= 5, 0.25, 1.0) * np.linspace(1.0, 1.5, days)
+    return weights / weights.sum()
+
+
+def _names(spec, generate):
+    return generate(spec) if isinstance(spec, int) else list(spec)
+
+
+def _person_names(n):
+    names = [f"{first} {last}" for last, first in itertools.product(LAST_NAMES, FIRST_NAMES)]
+    return _unique(names, n)
+
+
+def _teamspace_names(n):
+    return _unique(TEAMSPACE_NAMES, n)
+
+
+def _query_names(n):
+    names = [f"{a} {b}" for a, b in itertools.permutations(QUERY_WORDS, 2)]
+    return _unique(names, n)
+
+
+def _page_names(page_teamspace, teamspaces):
+    # "<Teamspace> <Topic>", numbered once the topics run out
+    names = []
+    position = np.arange(len(page_teamspace)) - np.searchsorted(page_teamspace, page_teamspace)
+    for teamspace, i in zip(page_teamspace.tolist(), position.tolist()):
+        topic = PAGE_TOPICS[i % len(PAGE_TOPICS)]
+        suffix = f" {i // len(PAGE_TOPICS) + 1}" if i >= len(PAGE_TOPICS) else ""
+        names.append(f"{teamspaces[teamspace]} {topic}{suffix}")
+    return names
+
+
+def _unique(base, n):
+    # Cycle through base, numbering repeats: "General", ..., "General 2", ...
+    return [base[i % len(base)] + (f" {i // len(base) + 1}" if i >= len(base) else "") for i in range(n)]
@@ -0,0 +1,102 @@
+"""AggregateCache: one computation per key however many sessions ask, expiry and the byte budget."""
+import threading
+import time
+
+import pytest
+
+from aggregates import AggregateCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_compute_once():
+    cache = AggregateCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("key", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Everyone but the computing thread is waiting on its result
+    wait_for(lambda: cache.stats()["coalesced"] == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"value": 42}] * 8
+    assert all(result is results[0] for result in results)
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 7, 0)
+    assert cache.get("key", compute) is results[0] and len(calls) == 1
+
+
+def test_failed_computation_reaches_waiters_and_is_not_cached():
+    cache = AggregateCache()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("no events")
+
+    errors = []
+
+    def get():
+        try:
+            cache.get("key", fail)
+        except ValueError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: cache.stats()["coalesced"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert cache.get("key", lambda: "retried") == "retried"
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = AggregateCache(ttl=10, clock=clock)
+    values = iter(["first", "second"])
+    assert cache.get("key", lambda: next(values)) == "first"
+    clock.now = 9.9
+    assert cache.get("key", lambda: next(values)) == "first"
+    clock.now = 10.0
+    assert cache.get("key", lambda: next(values)) == "second"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+
+def test_least_recently_used_entries_are_evicted_to_fit():
+    cache = AggregateCache(max_bytes=3000)
+    for key in "abc":
+        cache.get(key, lambda: "x" * 900)
+    cache.get("a", pytest.fail)
+    cache.get("d", lambda: "x" * 900)
+    assert set(cache.entries) == {"a", "c", "d"}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 3000
@@ -0,0 +1,83 @@
+"""The JSON API: ETags and 304s per snapshot, gzip, and argument checking."""
+import datetime
+import gzip
+import json
+
+from tornado.testing import AsyncHTTPTestCase
+
+from api import make_app
+from event_store import DAY, EventStore
+from snapshots import SnapshotScheduler, preset_window
+from synthetic import SyntheticWorkspace
+
+STORE = SyntheticWorkspace(members=30, pages=100, teamspaces=4, queries=20).store(20_000, days=60)
+# The same log a day earlier
+EARLIER = EventStore(
+    {name: column[:STORE.window(0, (STORE.end_time // DAY) * DAY).stop] for name, column in STORE.columns.items()},
+    STORE.members, STORE.pages, STORE.teamspaces, STORE.page_teamspace, STORE.queries, STORE.integrations,
+    assume_sorted=True,
+)
+
+
+class ApiTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.stores = [EARLIER]
+        self.scheduler = SnapshotScheduler(lambda: self.stores[-1], name="test", preset_days=(30,))
+        self.scheduler.refresh()
+        return make_app(self.scheduler)
+
+    def get(self, url, **kwargs):
+        return self.fetch(url, decompress_response=False, **kwargs)
+
+    def test_metrics_lists_every_metric(self):
+        body = json.loads(self.get("/api/metrics").body)
+        assert "cross_product" in body["metrics"]
+        assert body["teamspaces"] == EARLIER.teamspaces
+
+    def test_unchanged_metric_is_a_304(self):
+        response = self.get("/api/metrics/team_interactions?days=30")
+        assert response.code == 200
+        etag = response.headers["ETag"]
+        assert json.loads(response.body) == self.scheduler.current.aggregate("team_interactions", *preset_window(EARLIER, 30))
+
+        cached = self.get("/api/metrics/team_interactions?days=30", headers={"If-None-Match": etag})
+        assert cached.code == 304
+        assert cached.body == b""
+        # Another window is another figure
+        other = self.get("/api/metrics/team_interactions?days=7", headers={"If-None-Match": etag})
+        assert other.code == 200
+
+    def test_new_snapshot_changes_the_etag(self):
+        etag = self.get("/api/metrics/cross_team?days=30").headers["ETag"]
+        # Another day of events lands
+        self.stores.append(STORE)
+        assert self.scheduler.refresh()
+        response = self.get("/api/metrics/cross_team?days=30", headers={"If-None-Match": etag})
+        assert response.code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_large_responses_are_gzipped(self):
+        response = self.get("/api/metrics/content_engagement?days=30", headers={"Accept-Encoding": "gzip"})
+        assert response.code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        value = json.loads(gzip.decompress(response.body))
+        assert value == self.scheduler.current.aggregate("content_engagement", *preset_window(EARLIER, 30))
+
+        plain = self.get("/api/metrics/content_engagement?days=30")
+        assert "Content-Encoding" not in plain.headers
+        assert json.loads(plain.body) == value
+
+    def test_custom_range_is_computed(self):
+        last = datetime.date(1970, 1, 1) + datetime.timedelta(days=EARLIER.end_time // DAY)
+        start = last - datetime.timedelta(days=13)
+        response = self.get(f"/api/metrics/cross_product?start={start}&end={last}")
+        assert response.code == 200
+        expected = self.scheduler.current.aggregate("cross_product", *preset_window(EARLIER, 14))
+        assert json.loads(response.body) == expected
+
+    def test_bad_arguments(self):
+        assert self.get("/api/metrics/nothing").code == 404
+        assert self.get("/api/metrics/searches?days=0").code == 400
+        assert self.get("/api/metrics/searches?start=2025-11-14").code == 400
+        assert self.get("/api/metrics/searches?start=2025-11-14&end=2025-11-01").code == 400
+        assert self.get("/api/metrics/stale_content?teamspace=nowhere").code == 400
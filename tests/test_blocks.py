@@ -0,0 +1,32 @@
+"""Names from workspace data never become markup; charts show what the aggregates hold."""
+from assets import tag_person_icons
+from blocks import cross_product_table_html, engagement_table_html, member_card_html, mix_chart_data
+
+HOSTILE = '<img src=x onerror="alert(1)">'
+
+
+def test_member_card_escapes_names():
+    html = tag_person_icons(member_card_html("Active Members", 1, "# Sessions", [(HOSTILE, 3, "R&D")]))
+    assert "<img" not in html
+    assert "&lt;img src=x onerror=&quot;alert(1)&quot;&gt;" in html
+    assert "R&amp;D" in html
+    # The escaped name still gets its avatar
+    assert '<div class="person-icon"></div>' not in html
+
+
+def test_engagement_table_escapes_names():
+    row = dict(page=HOSTILE, top_member=HOSTILE, top_contributor=None, scroll_mean=50, scroll_median=40,
+               scroll_p90=90, dwell_mean=60, dwell_median=30, dwell_p90=120)
+    assert "<img" not in engagement_table_html({"pages": [row]})
+
+
+def test_cross_product_table_escapes_names():
+    row = {"teamspace": HOSTILE, "integrations": 3, "top_integration": HOSTILE}
+    assert "<img" not in tag_person_icons(cross_product_table_html({"teamspaces": [row]}))
+
+
+def test_mix_chart_leaves_out_empty_slices():
+    colors = ["#000001", "#000002", "#000003"]
+    data = mix_chart_data({"Edits": 5, "Comments": 0, "Shares": 2}, colors)
+    assert data == {"labels": ["Edits", "Shares"], "sizes": [5, 2], "colors": ["#000001", "#000003"]}
+    assert mix_chart_data({"Edits": 0}, colors) is None
@@ -0,0 +1,88 @@
+"""Re-exports only render the sections whose aggregates changed, but always show the current page."""
+import json
+import os
+
+import pytest
+
+import export
+from aggregates import AggregateCache, Workspace
+from charts import ChartCache, ChartRenderer
+from snapshots import Snapshot
+from synthetic import SyntheticWorkspace
+
+
+@pytest.fixture(scope="module")
+def store():
+    return SyntheticWorkspace(members=30, pages=100, teamspaces=4, queries=20).store(20_000, days=60)
+
+
+@pytest.fixture(autouse=True)
+def renderer(monkeypatch):
+    # Render in this process, with a cache of its own
+    monkeypatch.setattr(export, "RENDERER", ChartRenderer(workers=0, cache=ChartCache()))
+
+
+def snapshot(store):
+    return Snapshot.build(Workspace(store, "test", cache=AggregateCache()), preset_days=())
+
+
+def test_page_is_rebuilt_when_no_section_changed(store, tmp_path, monkeypatch):
+    path = str(tmp_path / "report.html")
+    assert len(export.export(snapshot(store), path, days=30)) == len(export.SECTIONS)
+    written = os.stat(path).st_mtime_ns
+
+    # Nothing changed: nothing is rendered or written
+    assert export.export(snapshot(store), path, days=30) == []
+    assert os.stat(path).st_mtime_ns == written
+
+    # Only the page around the sections changed: it is written, the sections are reused
+    monkeypatch.setattr(export, "EXPORT_CSS", export.EXPORT_CSS + "<!-- restyled -->")
+    assert export.export(snapshot(store), path, days=30) == []
+    with open(path, encoding="utf-8") as f:
+        assert "<!-- restyled -->" in f.read()
+    with open(path + ".sections.json") as f:
+        assert set(json.load(f)["sections"]) == {name for _, name, _, _ in export.SECTIONS}
+
+
+def manifest(path):
+    with open(path + ".sections.json") as f:
+        return json.load(f)["sections"]
+
+
+def test_only_changed_sections_are_rendered_again(store, tmp_path, monkeypatch):
+    path = str(tmp_path / "report.html")
+    export.export(snapshot(store), path, days=30)
+    before = manifest(path)
+    renders = export.RENDERER.stats()["renders"]
+
+    # One section's aggregate changes: its stalest page was just viewed
+    changed = snapshot(store)
+    aggregate = changed.aggregate
+
+    def fresher(metric, *args):
+        value = aggregate(metric, *args)
+        if metric == "stale_content":
+            value = {**value, "pages": value["pages"][1:]}
+        return value
+
+    monkeypatch.setattr(changed, "aggregate", fresher)
+    assert export.export(changed, path, days=30) == ["stale_content"]
+    after = manifest(path)
+
+    assert after["stale_content"]["digest"] != before["stale_content"]["digest"]
+    assert after["stale_content"]["html"] != before["stale_content"]["html"]
+    assert {name: section for name, section in after.items() if name != "stale_content"} == {
+        name: section for name, section in before.items() if name != "stale_content"
+    }
+    # Only the changed section's chart was drawn
+    assert export.RENDERER.stats()["renders"] == renders + 1
+
+
+def test_another_window_renders_every_section(store, tmp_path):
+    path = str(tmp_path / "report.html")
+    export.export(snapshot(store), path, days=30)
+    before = manifest(path)
+    names = [name for _, name, _, _ in export.SECTIONS]
+    assert export.export(snapshot(store), path, days=7) == names
+    after = manifest(path)
+    assert all(after[name]["digest"] != before[name]["digest"] for name in names)
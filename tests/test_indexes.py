@@ -0,0 +1,149 @@
+"""Incremental index updates must give the same figures as a full build."""
+import numpy as np
+import pytest
+
+from aggregates import Workspace
+from event_store import COLUMNS, DAY, EventStore, EventType
+from metrics import COLLABORATION, member_home_teamspaces, type_mask
+from search import SearchClicks
+from snapshots import Snapshot
+from synthetic import SyntheticWorkspace
+from trends import Trends
+
+D = 19_000 * DAY
+
+
+def make_store(events, queries=("budget",)):
+    """EventStore from (ts, member, event_type, detail, value) tuples."""
+    ts, member, event_type, detail, value = (np.array(column) for column in zip(*events))
+    n = len(ts)
+    columns = {name: np.zeros(n, dtype=dtype) for name, dtype in COLUMNS.items()}
+    columns.update(ts=ts, member=member, event_type=event_type, detail=detail, value=value)
+    return EventStore(columns, members=["a", "b"], pages=["p"], teamspaces=["t"], page_teamspace=[0], queries=list(queries))
+
+
+def prefix(store, n):
+    return EventStore(
+        {name: column[:n] for name, column in store.columns.items()},
+        store.members, store.pages, store.teamspaces, store.page_teamspace, store.queries, store.integrations,
+        assume_sorted=True,
+    )
+
+
+def test_search_click_after_update_boundary():
+    # A search at 23:58 whose click arrives after an update that stopped at 00:01
+    store = make_store([
+        (D + 12 * 3600, 1, EventType.SEARCH, 0, 3),
+        (D + DAY - 120, 0, EventType.SEARCH, 0, 3),
+        (D + DAY + 60, 1, EventType.VIEW, -1, 0),
+        (D + DAY + 180, 0, EventType.SEARCH_CLICK, 0, 0),
+        (D + DAY + 12 * 3600, 1, EventType.VIEW, -1, 0),
+    ])
+    incremental = SearchClicks.build(prefix(store, 3))
+    incremental.update(store)
+    full = SearchClicks.build(store)
+    window = (D, D + 2 * DAY)
+    assert full.total(*window) == (2, 0.5, 0.0, 0.5)
+    assert incremental.total(*window) == full.total(*window)
+
+
+@pytest.fixture(scope="module")
+def store():
+    return SyntheticWorkspace(members=60, pages=300, teamspaces=6, queries=50).store(100_000, days=120)
+
+
+def assert_same(a, b, path="index"):
+    """Recursively compare two index states (arrays, containers and objects)."""
+    if isinstance(a, np.ndarray):
+        np.testing.assert_array_equal(a, b, err_msg=path)
+    elif isinstance(a, dict):
+        assert a.keys() == b.keys(), path
+        for key in a:
+            assert_same(a[key], b[key], f"{path}[{key!r}]")
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b), path
+        for i, (x, y) in enumerate(zip(a, b)):
+            assert_same(x, y, f"{path}[{i}]")
+    elif hasattr(a, "__dict__"):
+        assert_same(vars(a), vars(b), path)
+    else:
+        assert a == b, path
+
+
+INDEXES = {
+    "rollup": ("rollup", "DailyRollup"),
+    "heavy_hitters": ("sketches", "HeavyHitters"),
+    "distinct_counts": ("sketches", "DistinctCounts"),
+    "page_histograms": ("sketches", "PageHistograms"),
+    "sessions": ("sessions", "Sessions"),
+    "search_clicks": ("search", "SearchClicks"),
+    "last_viewed": ("staleness", "LastViewed"),
+    "trends": ("trends", "Trends"),
+}
+
+
+def build_index(name, store):
+    module, cls = INDEXES[name]
+    index_type = getattr(__import__(module), cls)
+    if name == "trends":
+        # With home teamspaces, so that cross_team is counted too
+        return index_type.build(store, member_home=member_home_teamspaces(store))
+    return index_type.build(store)
+
+
+def update_index(name, index, store):
+    # Like Workspace.updated(): the home teamspaces are recomputed first
+    if name == "trends":
+        index.member_home = member_home_teamspaces(store)
+    index.update(store)
+
+
+@pytest.mark.parametrize("name", INDEXES)
+def test_incremental_update_matches_full_build(store, name):
+    full = build_index(name, store)
+    # Cuts at a day boundary, mid-day and a few seconds before the end
+    cuts = sorted([int(store.window(0, (store.end_time // DAY - 40) * DAY).stop), len(store) // 2, len(store) - 5])
+    incremental = build_index(name, prefix(store, cuts[0]))
+    for cut in cuts[1:] + [len(store)]:
+        update_index(name, incremental, prefix(store, cut))
+    assert_same(incremental, full)
+
+
+def test_cross_team_recounted_when_a_home_teamspace_moves():
+    # Member 0 edits a page of teamspace 1 while at home in teamspace 0 (cross-team),
+    # then views teamspace 1 until it is their home: now their teamspace 0 edits are
+    events = [
+        (D, 0, 0, EventType.EDIT),
+        (D + 60, 0, 0, EventType.EDIT),
+        (D + 120, 0, 1, EventType.EDIT),
+        (D + DAY, 0, 0, EventType.VIEW),
+        *[(D + 2 * DAY + i, 0, 1, EventType.VIEW) for i in range(5)],
+    ]
+    ts, member, teamspace, event_type = (np.array(column) for column in zip(*events))
+    columns = {name: np.zeros(len(ts), dtype=dtype) for name, dtype in COLUMNS.items()}
+    columns.update(ts=ts, member=member, teamspace=teamspace, page=teamspace, event_type=event_type, detail=np.full(len(ts), -1))
+    store = EventStore(columns, members=["a"], pages=["p0", "p1"], teamspaces=["t0", "t1"], page_teamspace=[0, 1])
+
+    # The first update stops on the following day, so day D isn't redone by the next one
+    incremental = build_index("trends", prefix(store, 4))
+    update_index("trends", incremental, store)
+    full = build_index("trends", store)
+    window = (D, D + 3 * DAY)
+    assert full.change("cross_team", *window)[0][0] == 2
+    assert incremental.change("cross_team", *window)[0][0] == 2
+    assert_same(incremental, full)
+
+
+@pytest.mark.parametrize("dropped", [(EventType.INTEGRATION,), (*COLLABORATION, EventType.INTEGRATION), tuple(EventType)])
+def test_snapshot_of_store_without_some_event_types(store, dropped):
+    # No integrations; no collaboration or cross-team events either; no events at all
+    keep = ~type_mask(store.event_type, dropped)
+    store = EventStore(
+        {name: column[keep] for name, column in store.columns.items()},
+        store.members, store.pages, store.teamspaces, store.page_teamspace, store.queries, store.integrations,
+        assume_sorted=True,
+    )
+    snapshot = Snapshot.build(Workspace(store))
+    for key, value in snapshot.aggregates.items():
+        if key[0] == "cross_product":
+            assert value["integrations"] == 0 and value["change"] is None
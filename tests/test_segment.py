@@ -0,0 +1,90 @@
+"""The event log must read back what was appended, whatever its segments were merged into."""
+import os
+
+import numpy as np
+import pytest
+
+import segment
+from event_store import COLUMNS
+from segment import EventLog
+from synthetic import SyntheticWorkspace
+
+
+@pytest.fixture(scope="module")
+def parts():
+    workspace = SyntheticWorkspace(members=20, pages=50, teamspaces=3, queries=10)
+    chunks = list(workspace.chunks(30_000, days=60, chunk_size=2_000))
+    return chunks, workspace.store(30_000, days=60, chunk_size=2_000)
+
+
+def assert_columns_equal(store, expected):
+    assert len(store) == len(expected)
+    for name in COLUMNS:
+        np.testing.assert_array_equal(store.columns[name], expected.columns[name])
+
+
+def test_append_never_reads_existing_segments(tmp_path, parts, monkeypatch):
+    chunks, expected = parts
+    log = EventLog(str(tmp_path))
+    log.append(chunks[0])
+    # Only headers may be read: no memmap, no opened segment, no concatenation
+    for name in ("_records", "open_segment", "_merge"):
+        monkeypatch.setattr(segment, name, lambda *args: pytest.fail(f"append() called {name}"))
+    before = {path: os.stat(path).st_mtime_ns for path in log.segment_paths()}
+    for chunk in chunks[1:]:
+        log.append(chunk)
+    monkeypatch.undo()
+
+    assert len(log.segment_paths()) == len(chunks)
+    assert all(os.stat(path).st_mtime_ns == mtime for path, mtime in before.items())
+    assert_columns_equal(log.open(), expected)
+
+
+def test_compact_streams_segments_into_one_mapped_segment(tmp_path, parts, monkeypatch):
+    chunks, expected = parts
+    log = EventLog(str(tmp_path))
+    for chunk in chunks:
+        log.append(chunk)
+    monkeypatch.setattr(EventLog, "MERGE_CHUNK", 1000)
+    monkeypatch.setattr(segment, "_merge", lambda *args: pytest.fail("compact() concatenated the log in memory"))
+    assert log.compact() == 1
+    monkeypatch.undo()
+
+    assert len(log.segment_paths()) == 1
+    store = log.open()
+    assert_columns_equal(store, expected)
+    assert isinstance(store.columns["ts"].base, np.memmap)
+
+
+def test_size_tiered_compaction_merges_fanout_segments_at_a_time(tmp_path, parts, monkeypatch):
+    chunks, expected = parts
+    monkeypatch.setattr(EventLog, "TIER_EVENTS", 2_500)
+    log = EventLog(str(tmp_path))
+    merged = []
+    merge_segments = EventLog._merge_segments
+    monkeypatch.setattr(EventLog, "_merge_segments", lambda self, run: merged.append(len(run)) or merge_segments(self, run))
+    for chunk in chunks:
+        log.append(chunk)
+        log.compact(fanout=2)
+
+    assert merged and set(merged) == {2}
+    # Logarithmically many segments are left, and they still read back in order
+    assert len(log.segment_paths()) <= 2 * np.log2(len(chunks)) + 1
+    assert_columns_equal(log.open(), expected)
+
+
+def test_reader_skips_segments_merged_into_a_newer_one(tmp_path, parts, monkeypatch):
+    chunks, expected = parts
+    log = EventLog(str(tmp_path))
+    for chunk in chunks:
+        log.append(chunk)
+    listed = log.segment_paths()
+    # As seen by a reader before the merged segments are deleted
+    monkeypatch.setattr(EventLog, "_remove", lambda self, paths: None)
+    log.compact()
+    monkeypatch.undo()
+    assert len(log.segment_paths()) == len(listed) + 1
+    assert_columns_equal(log.open(), expected)
+    # The next compaction clears them away
+    log.compact()
+    assert len(log.segment_paths()) == 1
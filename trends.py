@@ -0,0 +1,182 @@
+import numpy as np
+
+from event_store import DAY, EventType
+from metrics import COLLABORATION, cross_team_events, type_mask
+from sketches import KEY_STRIDE
+
+# Name -> (event types counted, event column the counts are kept per, or None for workspace totals)
+TREND_SERIES = {
+    "collaboration": (COLLABORATION, None),
+    "collaboration_types": (COLLABORATION, "event_type"),
+    "page_collaboration": (COLLABORATION, "page"),
+    "integrations": ((EventType.INTEGRATION,), None),
+    "integration_types": ((EventType.INTEGRATION,), "detail"),
+    "searches": ((EventType.SEARCH,), None),
+    "teamspace_searches": ((EventType.SEARCH,), "teamspace"),
+}
+
+
+class PrefixCounts:
+    """Daily counts per entity, stored as running totals.
+
+    The count over any day range is the difference of two running totals,
+    so a current-vs-previous comparison costs the same for a week as for a
+    year, and is answered for any number of entities in one vectorized
+    lookup. Dense keeps a running-total table per entity and day (O(1) per
+    entity; for a few entities, e.g. teamspaces). Sparse keeps them only
+    for (entity, day) pairs that have events, sorted by entity then day,
+    and finds the totals with searchsorted (for pages: a dense table of
+    every page and day would not fit in memory).
+    """
+
+    def __init__(self, dense=True):
+        self.dense = dense
+        # Dense: totals[entity, day] = events before that day
+        self.totals = np.zeros((0, 1), dtype=np.int64)
+        # Sparse: (entity * KEY_STRIDE + day) keys and events before each row
+        self.keys = np.empty(0, dtype=np.int64)
+        self.before = np.zeros(1, dtype=np.int64)
+
+    def replace(self, from_day, day, entity, weight=None):
+        """Drop the counts from from_day on and count these events (days from from_day on) instead."""
+        entity = entity.astype(np.int64)
+        if self.dense:
+            n_days = max(int(day.max(initial=from_day - 1)) + 1, from_day) - from_day
+            n_entities = max(len(self.totals), int(entity.max(initial=-1)) + 1)
+            if not n_entities:
+                return
+            kept = np.zeros((n_entities, from_day + 1), dtype=np.int64)
+            kept[:len(self.totals)] = self.totals[:, :from_day + 1]
+            counts = np.bincount(entity * n_days + (day - from_day), weights=weight, minlength=n_entities * n_days)
+            counts = counts.astype(np.int64).reshape(n_entities, n_days)
+            self.totals = np.hstack([kept, kept[:, -1:] + np.cumsum(counts, axis=1)])
+            return
+
+        key = entity * KEY_STRIDE + day
+        keys, inverse = np.unique(key, return_inverse=True)
+        counts = np.bincount(inverse, weights=weight, minlength=len(keys)).astype(np.int64)
+        kept = self.keys % KEY_STRIDE < from_day
+        keys = np.concatenate([self.keys[kept], keys])
+        counts = np.concatenate([np.diff(self.before)[kept], counts])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.before = np.concatenate([[0], np.cumsum(counts[order])])
+
+    def count(self, start_day, end_day, entities):
+        """Events of each entity in days [start_day, end_day)."""
+        entities = np.asarray(entities, dtype=np.int64)
+        if self.dense:
+            if not len(self.totals):
+                # No events counted yet
+                return np.zeros(len(entities), dtype=np.int64)
+            days = np.clip([start_day, end_day], 0, self.totals.shape[1] - 1)
+            known = (entities >= 0) & (entities < len(self.totals))
+            rows = self.totals[np.where(known, entities, 0)]
+            return np.where(known, rows[:, days[1]] - rows[:, days[0]], 0)
+        start_day, end_day = max(start_day, 0), max(end_day, 0)
+        lo = np.searchsorted(self.keys, entities * KEY_STRIDE + start_day)
+        hi = np.searchsorted(self.keys, entities * KEY_STRIDE + end_day)
+        return self.before[hi] - self.before[lo]
+
+    @property
+    def nbytes(self):
+        return self.totals.nbytes + self.keys.nbytes + self.before.nbytes
+
+
+class Trends:
+    """Running daily totals behind every "% more than previous" figure.
+
+    Besides TREND_SERIES there are "members" (members by the day of their
+    first event, so totals to date are the workspace's size then) and, with
+    member_home, "cross_team" (cross_team_events). change() compares a
+    day-aligned window with the one just before it for all keys at once.
+
+    Whether an edit is cross-team depends on the editor's home teamspace,
+    so when member_home is replaced (see Workspace.updated) and a member
+    already seen has moved, cross_team is recounted from the first day.
+    """
+
+    def __init__(self, series=TREND_SERIES, member_home=None):
+        self.specs = series
+        self.member_home = member_home
+        # The home teamspaces cross_team was counted with
+        self.cross_team_home = None
+        self.first_day = None
+        self.last_day = None
+        self.first_seen = np.empty(0, dtype=np.int64)
+        names = list(series) + ["members"] + (["cross_team"] if member_home is not None else [])
+        # Only pages are too many for a dense table
+        self.series = {name: PrefixCounts(dense=name not in series or series[name][1] != "page") for name in names}
+
+    @classmethod
+    def build(cls, store, **kwargs):
+        trends = cls(**kwargs)
+        trends.update(store)
+        return trends
+
+    def update(self, store):
+        """Redo the counts from the last aggregated (possibly partial) day onwards."""
+        if not len(store):
+            return
+        from_day = self.last_day if self.last_day is not None else store.start_time // DAY
+        if self.first_day is None:
+            self.first_day = from_day
+        window = store.window(from_day * DAY, store.end_time + 1)
+        day = store.ts[window] // DAY - self.first_day
+        event_type = store.event_type[window]
+        offset = from_day - self.first_day
+
+        for name, (types, column) in self.specs.items():
+            picked = np.flatnonzero(type_mask(event_type, types))
+            if column is not None:
+                entity = store.columns[column][window][picked]
+                picked, entity = picked[entity >= 0], entity[entity >= 0]
+            else:
+                entity = np.zeros(len(picked), dtype=np.int64)
+            self.series[name].replace(offset, day[picked], entity)
+        if self.member_home is not None:
+            home = np.asarray(self.member_home)
+            counted = self.cross_team_home
+            # Members without a home had no events, so none of theirs need recounting
+            if counted is not None and not np.any((counted >= 0) & (counted != home[:len(counted)])):
+                picked, _, _ = cross_team_events(store, window, home)
+                self.series["cross_team"].replace(offset, day[picked], np.zeros(len(picked), dtype=np.int64))
+            else:
+                whole = store.window(self.first_day * DAY, store.end_time + 1)
+                picked, _, _ = cross_team_events(store, whole, home)
+                day_of = store.ts[whole][picked] // DAY - self.first_day
+                self.series["cross_team"].replace(0, day_of, np.zeros(len(picked), dtype=np.int64))
+            self.cross_team_home = home.copy()
+
+        # A member's first event never moves, so only members new to the window are looked at
+        member = store.member[window]
+        first = np.full(len(store.members), len(member), dtype=np.int64)
+        np.minimum.at(first, member, np.arange(len(member)))
+        self.first_seen = np.concatenate([self.first_seen, np.full(len(first) - len(self.first_seen), -1)])
+        new = (self.first_seen < 0) & (first < len(member))
+        self.first_seen[new] = day[first[new]]
+        seen = self.first_seen[self.first_seen >= 0]
+        self.series["members"].replace(0, seen, np.zeros(len(seen), dtype=np.int64))
+
+        self.last_day = store.end_time // DAY
+
+    def change(self, name, start, end, keys=(0,), to_date=False):
+        """Compare the days covering [start, end) with as many days just before.
+
+        Returns (current, previous, change) arrays aligned with keys; change
+        is current / previous - 1 (NaN when previous is 0). With to_date the
+        counts run from the first day instead (totals at the window's end
+        vs at its start).
+        """
+        first = self.first_day if self.first_day is not None else 0
+        start_day, end_day = start // DAY - first, -(-end // DAY) - first
+        series = self.series[name]
+        current = series.count(-1 if to_date else start_day, end_day, keys)
+        previous = series.count(-1 if to_date else 2 * start_day - end_day, start_day, keys)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change = np.where(previous > 0, current / np.maximum(previous, 1) - 1, np.nan)
+        return current, previous, change
+
+    @property
+    def nbytes(self):
+        return sum(series.nbytes for series in self.series.values()) + self.first_seen.nbytes